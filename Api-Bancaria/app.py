@@ -1,16 +1,64 @@
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import asyncio
+import bisect
+import csv
+import errno
+import io
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, Literal, Optional
 import uuid
+from array import array
 
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, condecimal
+
+try:
+    import orjson
+except ImportError:  # opcional: sem orjson, FastJSONResponse cai no json da stdlib
+    orjson = None
 
 SECRET_KEY = "change_this_to_a_random_secret_change_it"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
+# bcrypt roda em um pool de threads limitado, fora do event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+# tokens já verificados ficam em cache até expirar (0 desliga o cache)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# armazenamento: "memory" (padrão, perde tudo ao reiniciar) ou "ledger" (arquivo append-only + snapshot)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory")
+LEDGER_PATH = os.getenv("LEDGER_PATH", "ledger.jsonl")
+LEDGER_SNAPSHOT_PATH = os.getenv("LEDGER_SNAPSHOT_PATH", LEDGER_PATH + ".snapshot")
+# "group": um fsync por lote de eventos; "always": um fsync por evento
+LEDGER_FSYNC_MODE = os.getenv("LEDGER_FSYNC_MODE", "group")
+LEDGER_SNAPSHOT_EVERY = int(os.getenv("LEDGER_SNAPSHOT_EVERY", "10000"))
+# respostas de depósito/saque com Idempotency-Key ficam guardadas por IDEMPOTENCY_TTL_SECONDS
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "100000"))
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# lote de transações: "atomic" (tudo ou nada) ou "best_effort" (aplica o que for válido)
+BATCH_MODE = os.getenv("BATCH_MODE", "atomic")
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "5000"))
+# maior valor aceito numa transação (em reais); mantém os centavos bem dentro de int64
+MAX_TRANSACTION_AMOUNT = Decimal(os.getenv("MAX_TRANSACTION_AMOUNT", "1000000000"))
+# token buckets "fichas_por_segundo,rajada": auth por IP, transações por IP e por usuário, e por conta
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_AUTH = os.getenv("RATE_LIMIT_AUTH", "1,10")
+RATE_LIMIT_TRANSACTION = os.getenv("RATE_LIMIT_TRANSACTION", "50,100")
+RATE_LIMIT_ACCOUNT = os.getenv("RATE_LIMIT_ACCOUNT", "20,40")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# FAST_JSON=1: extrato e listagem de contas serializados direto dos dados em memória (orjson se instalado)
+FAST_JSON = os.getenv("FAST_JSON", "0") == "1"
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token")
@@ -49,7 +97,8 @@ class AccountCreate(BaseModel):
 
 class TransactionCreate(BaseModel):
     account_id: str
-    amount: float
+    # Decimal só na entrada; internamente os valores são inteiros em centavos
+    amount: condecimal(gt=0, le=MAX_TRANSACTION_AMOUNT, decimal_places=2)
 
 
 class TransactionOut(BaseModel):
@@ -59,18 +108,881 @@ class TransactionOut(BaseModel):
     date: datetime
 
 
-class AccountOut(BaseModel):
+class TransferCreate(BaseModel):
+    from_account_id: str
+    # a conta de destino pode ser de outro usuário
+    to_account_id: str
+    amount: condecimal(gt=0, le=MAX_TRANSACTION_AMOUNT, decimal_places=2)
+
+
+class TransferOut(BaseModel):
+    debit: TransactionOut
+    credit: TransactionOut
+
+
+class BatchItem(BaseModel):
+    type: Literal["deposit", "withdraw", "transfer"]
+    account_id: str
+    amount: condecimal(gt=0, le=MAX_TRANSACTION_AMOUNT, decimal_places=2)
+    # só para transfer: conta de destino (pode ser de outro usuário)
+    to_account_id: Optional[str] = None
+
+
+class BatchCreate(BaseModel):
+    items: List[BatchItem]
+    # sem mode, vale o BATCH_MODE configurado
+    mode: Optional[Literal["atomic", "best_effort"]] = None
+
+
+class AccountSummary(BaseModel):
     id: str
     owner: str
     balance: float
     nickname: Optional[str]
+
+
+class AccountOut(AccountSummary):
     transactions: List[TransactionOut] = []
 
 
+class StatementOut(AccountOut):
+    next_cursor: Optional[str] = None
+
+
 users: Dict[str, Dict] = {}
 accounts: Dict[str, Dict] = {}
 
 
+# ----------------- Password hashing pool -----------------
+_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_pending = 0
+
+
+async def _run_password_task(func, *args):
+    # bcrypt libera o GIL, então threads bastam; acima do limite de fila a requisição é recusada
+    global _hash_pending
+    if _hash_pending >= PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, try again later",
+            headers={"Retry-After": "1"},
+        )
+    _hash_pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_pending -= 1
+
+
+# ----------------- Token cache -----------------
+class TokenCache:
+    # LRU token -> (username, exp); evita jwt.decode + TokenData a cada requisição autenticada
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._by_user: Dict[str, set] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[str]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        username, exp = entry
+        if exp <= time.time():
+            self._discard(token)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return username
+
+    def peek(self, token: str) -> Optional[str]:
+        # consulta sem mexer na ordem LRU nem nas estatísticas (usada pelo rate limiter)
+        entry = self._entries.get(token)
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    def put(self, token: str, username: str, exp: float):
+        if self.maxsize <= 0:
+            return
+        self._entries[token] = (username, exp)
+        self._entries.move_to_end(token)
+        self._by_user.setdefault(username, set()).add(token)
+        while len(self._entries) > self.maxsize:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+
+    def _discard(self, token: str):
+        username, _ = self._entries.pop(token)
+        tokens = self._by_user.get(username)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[username]
+
+    def invalidate_user(self, username: str):
+        for token in self._by_user.pop(username, ()):
+            self._entries.pop(token, None)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+
+
+# ----------------- Idempotency -----------------
+class IdempotencyStore:
+    # (usuário, Idempotency-Key) -> (expira_em, fingerprint, future) em ordem de inserção; como o TTL é fixo,
+    # a entrada mais antiga é sempre a próxima a expirar e a limpeza só olha o começo do dict.
+    # Um retry que chega enquanto a primeira execução ainda roda espera o mesmo future.
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _evict(self, now: float):
+        while self._entries:
+            key, (expires, _, _) = next(iter(self._entries.items()))
+            if expires > now and len(self._entries) <= self.maxsize:
+                break
+            del self._entries[key]
+            self.evictions += 1
+
+    async def run(self, key: tuple, fingerprint: tuple, func):
+        now = time.monotonic()
+        self._evict(now)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[1] != fingerprint:
+                raise HTTPException(status_code=422, detail="Idempotency-Key already used with a different request")
+            self.hits += 1
+            return await asyncio.shield(entry[2])
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._entries[key] = (now + self.ttl, fingerprint, future)
+        self._evict(now)
+        try:
+            result = await func()
+        except BaseException as exc:
+            # falhas não ficam guardadas: o próximo retry executa de novo
+            if self._entries.get(key, (None, None, None))[2] is future:
+                del self._entries[key]
+            future.set_exception(exc)
+            future.exception()  # marca como lida mesmo sem retries esperando
+            raise
+        future.set_result(result)
+        return result
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+idempotency_store = IdempotencyStore(IDEMPOTENCY_CACHE_SIZE, IDEMPOTENCY_TTL_SECONDS)
+
+
+async def _idempotent(current_user: Dict, key: Optional[str], fingerprint: tuple, func):
+    if key is None:
+        return await func()
+    return await idempotency_store.run((current_user["username"], key), fingerprint, func)
+
+
+# ----------------- Rate limiting -----------------
+def _parse_budget(value: str) -> tuple:
+    rate, burst = (float(part) for part in value.split(","))
+    if rate <= 0 or burst < 1:
+        raise ValueError(f"Invalid rate limit budget {value!r}: rate must be > 0 and burst >= 1")
+    return rate, burst
+
+
+class RateLimiter:
+    # um token bucket por (orçamento, chave), atualizado só quando a chave aparece: O(1) por requisição.
+    # Buckets parados voltam a ficar cheios, então descartar os menos recentes (acima de max_keys) é seguro
+    def __init__(self, budgets: Dict[str, tuple], max_keys: int):
+        self.budgets = budgets
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[tuple, list]" = OrderedDict()
+        self.allowed = {name: 0 for name in budgets}
+        self.rejected = {name: 0 for name in budgets}
+
+    def acquire(self, budget: str, key: tuple) -> float:
+        # 0.0 se a requisição passa; senão, segundos até a próxima ficha
+        rate, burst = self.budgets[budget]
+        now = time.monotonic()
+        bucket = self._buckets.get((budget, key))
+        if bucket is None:
+            bucket = self._buckets[(budget, key)] = [burst, now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end((budget, key))
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            self.allowed[budget] += 1
+            return 0.0
+        self.rejected[budget] += 1
+        return (1 - bucket[0]) / rate
+
+    def stats(self):
+        return {
+            "buckets": len(self._buckets),
+            "max_keys": self.max_keys,
+            "budgets": {
+                name: {"rate": rate, "burst": burst, "allowed": self.allowed[name], "rejected": self.rejected[name]}
+                for name, (rate, burst) in self.budgets.items()
+            },
+        }
+
+
+rate_limiter = RateLimiter(
+    {
+        "auth": _parse_budget(RATE_LIMIT_AUTH),
+        "transaction": _parse_budget(RATE_LIMIT_TRANSACTION),
+        "account": _parse_budget(RATE_LIMIT_ACCOUNT),
+    },
+    RATE_LIMIT_MAX_KEYS,
+)
+AUTH_PATHS = ("/token", "/signup")
+
+
+def _retry_after(wait: float) -> Dict[str, str]:
+    return {"Retry-After": str(math.ceil(wait))}
+
+
+class RateLimitMiddleware:
+    # ASGI puro: auth limitada por IP; /transactions/* por IP e pelo usuário do token. Os limites por
+    # usuário na auth (limit_auth_user) e por conta (limit_account) são aplicados nos handlers
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            path = scope["path"]
+            client = scope["client"][0] if scope.get("client") else "unknown"
+            wait = 0.0
+            if path in AUTH_PATHS:
+                wait = self.limiter.acquire("auth", ("ip", client))
+            elif path.startswith("/transactions/"):
+                wait = self.limiter.acquire("transaction", ("ip", client))
+                username = self._username(scope)
+                if not wait and username:
+                    wait = self.limiter.acquire("transaction", ("user", username))
+            if wait:
+                response = JSONResponse(
+                    {"detail": "Too many requests"},
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    headers=_retry_after(wait),
+                )
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _username(scope) -> Optional[str]:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                return _token_username(token) if scheme.lower() == "bearer" else None
+        return None
+
+
+def _token_username(token: str) -> Optional[str]:
+    # cache de tokens primeiro; num miss (ou com TOKEN_CACHE_SIZE=0) decodifica o JWT. Não grava no cache:
+    # isso fica para get_current_user, que também confere se o usuário existe
+    username = token_cache.peek(token)
+    if username is not None:
+        return username
+    try:
+        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+    except JWTError:
+        return None
+
+
+def _limit(budget: str, key):
+    if not RATE_LIMIT_ENABLED:
+        return
+    wait = rate_limiter.acquire(budget, key)
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many requests", headers=_retry_after(wait)
+        )
+
+
+def limit_account(account_id: str):
+    _limit("account", account_id)
+
+
+def limit_auth_user(username: str):
+    # cobrado antes do bcrypt: força bruta contra um usuário vinda de muitos IPs também é limitada
+    _limit("auth", ("user", username))
+
+
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
+
+@app.get("/metrics/rate-limit")
+async def rate_limit_metrics():
+    return rate_limiter.stats()
+
+
+# ----------------- Account locks -----------------
+class AccountLocks:
+    # um asyncio.Lock por conta, criado sob demanda e descartado quando ninguém o usa;
+    # contas diferentes nunca disputam o mesmo lock
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def lock(self, account_id: str):
+        async with self.lock_many([account_id]):
+            yield
+
+    @asynccontextmanager
+    async def lock_many(self, account_ids):
+        # ordem fixa de aquisição (ids ordenados) evita deadlock entre operações multi-conta
+        ids = sorted(set(account_ids))
+        for account_id in ids:
+            self._users[account_id] = self._users.get(account_id, 0) + 1
+            self._locks.setdefault(account_id, asyncio.Lock())
+        acquired = []
+        try:
+            for account_id in ids:
+                await self._locks[account_id].acquire()
+                acquired.append(account_id)
+            yield
+        finally:
+            for account_id in reversed(acquired):
+                self._locks[account_id].release()
+            for account_id in ids:
+                self._users[account_id] -= 1
+                if not self._users[account_id]:
+                    del self._users[account_id]
+                    del self._locks[account_id]
+
+
+account_locks = AccountLocks()
+
+
+# ----------------- Money -----------------
+# saldos e valores são inteiros em centavos: somas exatas e sem alocação de Decimal no caminho quente.
+# Nas respostas viram float (centavos / 100), que sempre tem representação decimal exata com 2 casas.
+def to_cents(amount: Decimal) -> int:
+    return int(amount * 100)
+
+
+def from_cents(cents: int) -> float:
+    return cents / 100
+
+
+# ----------------- Transaction store -----------------
+TX_TYPES = ("Deposit", "Withdraw", "TransferIn", "TransferOut")
+TX_TYPE_CODES = {name: code for code, name in enumerate(TX_TYPES)}
+TX_SIGNS = {"Deposit": 1, "Withdraw": -1, "TransferIn": 1, "TransferOut": -1}
+# valores e saldos vivem em colunas int64
+INT64_MAX = 2**63 - 1
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _to_micros(when: datetime) -> int:
+    delta = when - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _from_micros(micros: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+class TransactionStore:
+    # histórico colunar de uma conta: arrays de int64 (data em µs, valor em centavos),
+    # tipo em 1 byte e id em 16 bytes. Cada transação custa ~33 bytes em vez de um dict.
+    # As transações são anexadas em ordem cronológica, então buscas por data são binárias.
+    CHECKPOINT_EVERY = 1024
+
+    def __init__(self):
+        self._ids = bytearray()
+        self._dates = array("q")
+        self._cents = array("q")
+        self._types = array("b")
+        # saldo (centavos) antes do índice k * CHECKPOINT_EVERY
+        self._checkpoints = array("q")
+        self._running = 0
+
+    def __len__(self):
+        return len(self._dates)
+
+    def _record(self, i: int) -> Dict:
+        return {
+            "id": str(uuid.UUID(bytes=bytes(self._ids[i * 16:(i + 1) * 16]))),
+            "type": TX_TYPES[self._types[i]],
+            "amount_cents": self._cents[i],
+            "date": _from_micros(self._dates[i]),
+        }
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._record(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transaction index out of range")
+        return self._record(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._record(i)
+
+    def append(self, tr: Dict):
+        # tudo é calculado e validado antes de escrever: uma falha não deixa as colunas desalinhadas
+        cents = tr["amount_cents"]
+        code = TX_TYPE_CODES[tr["type"]]
+        id_bytes = uuid.UUID(tr["id"]).bytes
+        micros = _to_micros(tr["date"])
+        running = self._running + TX_SIGNS[tr["type"]] * cents
+        if not 0 <= cents <= INT64_MAX or abs(running) > INT64_MAX:
+            raise OverflowError("transaction amount or balance out of range")
+        if len(self) % self.CHECKPOINT_EVERY == 0:
+            self._checkpoints.append(self._running)
+        self._ids += id_bytes
+        self._dates.append(micros)
+        self._cents.append(cents)
+        self._types.append(code)
+        self._running = running
+
+    def truncate(self, size: int):
+        # descarta as transações a partir de `size` (desfaz appends cuja gravação no ledger falhou)
+        self._running = self.balance_before(size)
+        del self._ids[size * 16:]
+        del self._dates[size:]
+        del self._cents[size:]
+        del self._types[size:]
+        del self._checkpoints[(size + self.CHECKPOINT_EVERY - 1) // self.CHECKPOINT_EVERY:]
+
+    def rows(self, lo: int, hi: int) -> List[Dict]:
+        # registros já no formato da resposta (valor em reais), lidos direto dos arrays, para o FastJSONResponse;
+        # o id é formatado a partir do hex, sem criar um uuid.UUID por transação
+        ids = self._ids[lo * 16:hi * 16].hex()
+        dates = self._dates
+        cents = self._cents
+        types = self._types
+        result = []
+        for i in range(lo, hi):
+            h = ids[(i - lo) * 32:(i - lo + 1) * 32]
+            result.append({
+                "id": f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}",
+                "type": TX_TYPES[types[i]],
+                "amount": cents[i] / 100,
+                "date": _EPOCH + timedelta(microseconds=dates[i]),
+            })
+        return result
+
+    def index_at(self, when: datetime) -> int:
+        # primeiro índice com date >= when
+        return bisect.bisect_left(self._dates, _to_micros(when))
+
+    def balance_before(self, index: int) -> int:
+        # saldo em centavos somando só a partir do checkpoint mais próximo (no máximo CHECKPOINT_EVERY itens)
+        if index >= len(self):
+            return self._running
+        checkpoint = index // self.CHECKPOINT_EVERY
+        total = self._checkpoints[checkpoint]
+        for i in range(checkpoint * self.CHECKPOINT_EVERY, index):
+            total += TX_SIGNS[TX_TYPES[self._types[i]]] * self._cents[i]
+        return total
+
+    def balance_at(self, when: datetime) -> int:
+        # saldo em centavos ao fim de `when` (inclui transações com date <= when)
+        return self.balance_before(bisect.bisect_right(self._dates, _to_micros(when)))
+
+    def to_json(self) -> Dict:
+        return {
+            "ids": self._ids.hex(),
+            "dates": self._dates.tolist(),
+            "cents": self._cents.tolist(),
+            "types": [TX_TYPES[t] for t in self._types],
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict) -> "TransactionStore":
+        store = cls()
+        ids = bytes.fromhex(data["ids"])
+        for i, (micros, cents, t_type) in enumerate(zip(data["dates"], data["cents"], data["types"])):
+            store.append({
+                "id": str(uuid.UUID(bytes=ids[i * 16:(i + 1) * 16])),
+                "type": t_type,
+                "amount_cents": cents,
+                "date": _from_micros(micros),
+            })
+        return store
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, TransactionStore):
+        return value.to_json()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    # para conteúdo que já é dict/list pronto: sem validação pydantic nem jsonable_encoder
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(content, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _transaction_out(tr: Dict) -> "TransactionOut":
+    return TransactionOut(id=tr["id"], type=tr["type"], amount=from_cents(tr["amount_cents"]), date=tr["date"])
+
+
+def _account_out(account: Dict) -> "AccountOut":
+    return AccountOut(
+        id=account["id"],
+        owner=account["owner"],
+        balance=from_cents(account["balance_cents"]),
+        nickname=account["nickname"],
+        transactions=[_transaction_out(tr) for tr in account["transactions"]],
+    )
+
+
+# ----------------- Account access -----------------
+# users[username]["accounts"] é o índice dono -> contas; o resumo de cada conta fica pronto para JSON
+# e só é refeito quando o saldo muda (_apply_tx), então listar contas não monta modelos pydantic
+account_summaries: Dict[str, Dict] = {}
+
+
+def get_owned_account(account_id: str, current_user: Dict) -> Dict:
+    account = accounts.get(account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if account["owner"] != current_user["username"]:
+        raise HTTPException(status_code=403, detail="Not authorized for this account")
+    return account
+
+
+def _account_summary(account: Dict) -> Dict:
+    summary = account_summaries.get(account["id"])
+    if summary is None:
+        summary = account_summaries[account["id"]] = {
+            "id": account["id"],
+            "owner": account["owner"],
+            "balance": from_cents(account["balance_cents"]),
+            "nickname": account["nickname"],
+        }
+    return summary
+
+
+def _apply_tx(account: Dict, t_type: str, cents: int) -> Dict:
+    # o saldo só muda depois que o histórico aceitou a transação
+    tr = _create_transaction_record(t_type, cents)
+    try:
+        account["transactions"].append(tr)
+    except OverflowError:
+        raise HTTPException(status_code=400, detail="Balance limit exceeded")
+    account["balance_cents"] += TX_SIGNS[t_type] * cents
+    account_summaries.pop(account["id"], None)
+    return tr
+
+
+def _revert_txs(applied: List[tuple]):
+    # desfaz, em ordem inversa, transações (conta, tr) aplicadas sob o lock da conta que ainda está preso
+    for account, tr in reversed(applied):
+        transactions = account["transactions"]
+        transactions.truncate(len(transactions) - 1)
+        account["balance_cents"] -= TX_SIGNS[tr["type"]] * tr["amount_cents"]
+        account_summaries.pop(account["id"], None)
+
+
+# ----------------- Storage -----------------
+def _apply_event(event: Dict):
+    # reconstrói o estado em memória a partir de um evento do ledger (usado no replay)
+    op = event["op"]
+    if op == "user":
+        users[event["username"]] = {
+            "username": event["username"],
+            "full_name": event["full_name"],
+            "hashed_password": event["hashed_password"],
+            "accounts": [],
+        }
+    elif op == "account":
+        accounts[event["id"]] = {
+            "id": event["id"],
+            "owner": event["owner"],
+            "balance_cents": 0,
+            "nickname": event["nickname"],
+            "transactions": TransactionStore(),
+        }
+        users[event["owner"]]["accounts"].append(event["id"])
+    elif op == "tx":
+        account = accounts[event["account_id"]]
+        tr = dict(event["tx"], date=datetime.fromisoformat(event["tx"]["date"]))
+        account["transactions"].append(tr)
+        account["balance_cents"] = event["balance_cents"]
+        account_summaries.pop(account["id"], None)
+    elif op == "batch":
+        # lote gravado como um único evento: no replay entra inteiro ou não entra
+        for entry in event["txs"]:
+            _apply_event(dict(entry, op="tx"))
+
+
+def _load_state(data: Dict):
+    users.clear()
+    users.update(data["users"])
+    accounts.clear()
+    account_summaries.clear()
+    for account_id, account in data["accounts"].items():
+        account["transactions"] = TransactionStore.from_json(account["transactions"])
+        accounts[account_id] = account
+
+
+class Storage:
+    # backend padrão: só memória. persist() é chamado logo após cada mudança de estado (via _persist)
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def persist(self, event: Dict):
+        pass
+
+
+class LedgerStorage(Storage):
+    # write-ahead log append-only (JSON lines) com group commit: os eventos que chegam enquanto
+    # um fsync está em andamento são gravados juntos no próximo, com um único fsync
+    def __init__(self, path: str, snapshot_path: str, fsync_mode: str = "group", snapshot_every: int = 10000):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.fsync_mode = fsync_mode
+        self.snapshot_every = snapshot_every
+        self._seq = 0
+        self._since_snapshot = 0
+        self._pending: List[tuple] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._fd: Optional[int] = None
+        self._truncate_to: Optional[int] = None
+        self._closing = False
+        self.commits = 0
+        self.fsyncs = 0
+        self.snapshot_failures = 0
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._recover)
+        self._open()
+        self._wakeup = asyncio.Event()
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def _recover(self):
+        # snapshot + replay apenas dos eventos posteriores a ele
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            _load_state(snapshot["state"])
+            snapshot_seq = snapshot["seq"]
+        self._seq = snapshot_seq
+        if os.path.exists(self.path):
+            with open(self.path, "rb+") as f:
+                valid = 0
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # última linha incompleta (queda no meio da escrita)
+                    valid += len(line)
+                    if entry["seq"] <= snapshot_seq:
+                        continue
+                    _apply_event(entry["event"])
+                    self._seq = entry["seq"]
+                    self._since_snapshot += 1
+                # corta o lixo do fim: os próximos eventos são anexados logo após o último válido
+                if valid < os.fstat(f.fileno()).st_size:
+                    f.truncate(valid)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def _open(self):
+        # fd sem buffer: o que não foi gravado não fica num buffer para sair no próximo flush
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    async def persist(self, event: Dict):
+        # enfileira de forma síncrona (mantém a ordem das mudanças de estado) e espera o fsync do lote
+        if self._writer is None or self._writer.done():
+            raise OSError(errno.EIO, "Ledger writer is not running")
+        self._seq += 1
+        line = json.dumps({"seq": self._seq, "event": event}, default=_json_default) + "\n"
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((line, future))
+        self._wakeup.set()
+        await future
+
+    async def _write_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            batch, self._pending = self._pending, []
+            if not batch:
+                if self._closing:
+                    return
+                continue
+            try:
+                await loop.run_in_executor(None, self._write_batch, [line for line, _ in batch])
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.commits += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+            self._since_snapshot += len(batch)
+            # só com a fila vazia: o snapshot não pode conter estado de eventos ainda não gravados
+            if self.snapshot_every and self._since_snapshot >= self.snapshot_every and not self._pending:
+                try:
+                    await self._snapshot()
+                except Exception:
+                    # o ledger continua completo; tenta de novo depois do próximo lote
+                    self.snapshot_failures += 1
+            if self._closing:
+                self._wakeup.set()
+
+    def _write_all(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(self._fd, view):]
+
+    def _write_batch(self, lines: List[str]):
+        # em caso de erro o lote inteiro falha: o arquivo volta ao tamanho anterior ao lote
+        if self._fd is None:
+            self._open()
+        if self._truncate_to is not None:
+            # sobra de um lote que falhou e não pôde ser cortado na hora
+            os.ftruncate(self._fd, self._truncate_to)
+            self._truncate_to = None
+        offset = os.lseek(self._fd, 0, os.SEEK_END)
+        try:
+            if self.fsync_mode == "always":
+                for line in lines:
+                    self._write_all(line.encode())
+                    os.fsync(self._fd)
+                    self.fsyncs += 1
+                return
+            self._write_all("".join(lines).encode())
+            os.fsync(self._fd)
+            self.fsyncs += 1
+        except Exception:
+            self._truncate_to = offset
+            fd, self._fd = self._fd, None
+            try:
+                os.ftruncate(fd, offset)
+                self._truncate_to = None
+            except OSError:
+                pass
+            os.close(fd)  # reaberto no próximo lote
+            raise
+
+    async def _snapshot(self):
+        # o estado serializado aqui inclui todos os eventos já enfileirados (seq atual);
+        # depois de gravado, o ledger pode ser truncado
+        data = json.dumps(
+            {"seq": self._seq, "state": {"users": users, "accounts": accounts}}, default=_json_default
+        )
+        await asyncio.get_running_loop().run_in_executor(None, self._write_snapshot, data)
+        self._since_snapshot = 0
+
+    def _write_snapshot(self, data: str):
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        if self._fd is None:
+            self._open()
+        os.ftruncate(self._fd, 0)
+        self._truncate_to = None
+
+    async def stop(self):
+        # grava o que está pendente, tira um snapshot final e fecha o ledger
+        if self._writer is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._writer
+        self._writer = None
+        try:
+            await self._snapshot()
+        finally:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+async def _persist(event: Dict, undo):
+    # o estado em memória muda antes da gravação; se ela falhar, desfaz antes de devolver o erro
+    try:
+        await storage.persist(event)
+    except OSError:
+        undo()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Storage unavailable, try again later",
+            headers={"Retry-After": "1"},
+        )
+    except Exception:
+        undo()
+        raise
+
+
+def _create_storage() -> Storage:
+    if STORAGE_BACKEND == "ledger":
+        return LedgerStorage(LEDGER_PATH, LEDGER_SNAPSHOT_PATH, LEDGER_FSYNC_MODE, LEDGER_SNAPSHOT_EVERY)
+    return Storage()
+
+
+storage = _create_storage()
+
+
+@app.on_event("startup")
+async def startup():
+    await storage.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await storage.stop()
+
+
 # ----------------- Auth -----------------
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -80,11 +992,19 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
-def authenticate_user(username: str, password: str):
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_password_task(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password):
+    return await _run_password_task(get_password_hash, password)
+
+
+async def authenticate_user(username: str, password: str):
     user = users.get(username)
     if not user:
         return False
-    if not verify_password(password, user["hashed_password"]):
+    if not await verify_password_async(password, user["hashed_password"]):
         return False
     return user
 
@@ -106,15 +1026,20 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    username = token_cache.get(token)
+    if username is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+            token_data = TokenData(username=username)
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
-    user = users.get(token_data.username)
+        username = token_data.username
+        if "exp" in payload:
+            token_cache.put(token, username, payload["exp"])
+    user = users.get(username)
     if user is None:
         raise credentials_exception
     return user
@@ -123,21 +1048,31 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
 # ----------------- Endpoints -----------------
 @app.post("/signup", response_model=UserOut, status_code=201)
 async def signup(payload: UserCreate):
+    limit_auth_user(payload.username)
     if payload.username in users:
         raise HTTPException(status_code=400, detail="Username already registered")
-    hashed = get_password_hash(payload.password)
+    hashed = await get_password_hash_async(payload.password)
+    # outro signup com o mesmo nome pode ter terminado enquanto o hash era calculado
+    if payload.username in users:
+        raise HTTPException(status_code=400, detail="Username already registered")
+    token_cache.invalidate_user(payload.username)
     users[payload.username] = {
         "username": payload.username,
         "full_name": payload.full_name,
         "hashed_password": hashed,
         "accounts": [],
     }
+    await _persist(
+        {"op": "user", "username": payload.username, "full_name": payload.full_name, "hashed_password": hashed},
+        lambda: users.pop(payload.username),
+    )
     return {"username": payload.username, "full_name": payload.full_name}
 
 
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = authenticate_user(form_data.username, form_data.password)
+    limit_auth_user(form_data.username)
+    user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -157,67 +1092,303 @@ async def create_account(payload: AccountCreate, current_user: Dict = Depends(ge
     account = {
         "id": account_id,
         "owner": current_user["username"],
-        "balance": 0.0,
+        "balance_cents": 0,
         "nickname": payload.nickname,
-        "transactions": [],
+        "transactions": TransactionStore(),
     }
     accounts[account_id] = account
     current_user["accounts"].append(account_id)
-    return AccountOut(**account)
+
+    def undo():
+        del accounts[account_id]
+        current_user["accounts"].remove(account_id)
+
+    await _persist(
+        {"op": "account", "id": account_id, "owner": current_user["username"], "nickname": payload.nickname}, undo
+    )
+    return _account_out(account)
 
 
 @app.get("/accounts", response_model=List[AccountOut])
-async def list_accounts(current_user: Dict = Depends(get_current_user)):
-    result = [AccountOut(**accounts[a]) for a in current_user["accounts"]]
-    return result
+async def list_accounts(summary: bool = False, current_user: Dict = Depends(get_current_user)):
+    owned = [accounts[account_id] for account_id in current_user["accounts"]]
+    if summary:
+        # sem as transações: resposta de tamanho constante por conta
+        return JSONResponse([_account_summary(a) for a in owned])
+    if FAST_JSON:
+        return FastJSONResponse([
+            dict(_account_summary(a), transactions=a["transactions"].rows(0, len(a["transactions"]))) for a in owned
+        ])
+    return JSONResponse([
+        dict(_account_summary(a), transactions=[_transaction_dict(tr) for tr in a["transactions"]]) for a in owned
+    ])
 
 
-def _create_transaction_record(t_type: str, amount: float):
+def _amount_cents(amount: Decimal) -> int:
+    cents = to_cents(amount)
+    if cents <= 0:
+        raise HTTPException(status_code=400, detail="Amount must be positive")
+    return cents
+
+
+def _create_transaction_record(t_type: str, amount_cents: int):
     return {
         "id": str(uuid.uuid4()),
         "type": t_type,
-        "amount": amount,
+        "amount_cents": amount_cents,
         "date": datetime.utcnow(),
     }
 
 
 @app.post("/transactions/deposit", response_model=TransactionOut)
-async def deposit(payload: TransactionCreate, current_user: Dict = Depends(get_current_user)):
-    if payload.amount <= 0:
-        raise HTTPException(status_code=400, detail="Amount must be positive")
-    account = accounts.get(payload.account_id)
-    if not account:
-        raise HTTPException(status_code=404, detail="Account not found")
-    if account["owner"] != current_user["username"]:
-        raise HTTPException(status_code=403, detail="Not authorized for this account")
-    account["balance"] += payload.amount
-    tr = _create_transaction_record("Deposit", payload.amount)
-    account["transactions"].append(tr)
-    return TransactionOut(**tr)
+async def deposit(
+    payload: TransactionCreate,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: Dict = Depends(get_current_user),
+):
+    amount = _amount_cents(payload.amount)
+    account = get_owned_account(payload.account_id, current_user)
+    limit_account(account["id"])
+
+    async def apply():
+        async with account_locks.lock(account["id"]):
+            tr = _apply_tx(account, "Deposit", amount)
+            await _persist(
+                {"op": "tx", "account_id": account["id"], "balance_cents": account["balance_cents"], "tx": tr},
+                lambda: _revert_txs([(account, tr)]),
+            )
+        return _transaction_out(tr)
+
+    return await _idempotent(current_user, idempotency_key, ("deposit", account["id"], amount), apply)
 
 
 @app.post("/transactions/withdraw", response_model=TransactionOut)
-async def withdraw(payload: TransactionCreate, current_user: Dict = Depends(get_current_user)):
-    if payload.amount <= 0:
-        raise HTTPException(status_code=400, detail="Amount must be positive")
-    account = accounts.get(payload.account_id)
-    if not account:
-        raise HTTPException(status_code=404, detail="Account not found")
-    if account["owner"] != current_user["username"]:
-        raise HTTPException(status_code=403, detail="Not authorized for this account")
-    if payload.amount > account["balance"]:
-        raise HTTPException(status_code=400, detail="Insufficient balance")
-    account["balance"] -= payload.amount
-    tr = _create_transaction_record("Withdraw", payload.amount)
-    account["transactions"].append(tr)
-    return TransactionOut(**tr)
+async def withdraw(
+    payload: TransactionCreate,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: Dict = Depends(get_current_user),
+):
+    amount = _amount_cents(payload.amount)
+    account = get_owned_account(payload.account_id, current_user)
+    limit_account(account["id"])
 
+    async def apply():
+        # checagem de saldo e débito sob o mesmo lock: saques concorrentes não deixam o saldo negativo
+        async with account_locks.lock(account["id"]):
+            if amount > account["balance_cents"]:
+                raise HTTPException(status_code=400, detail="Insufficient balance")
+            tr = _apply_tx(account, "Withdraw", amount)
+            await _persist(
+                {"op": "tx", "account_id": account["id"], "balance_cents": account["balance_cents"], "tx": tr},
+                lambda: _revert_txs([(account, tr)]),
+            )
+        return _transaction_out(tr)
 
-@app.get("/accounts/{account_id}/statement", response_model=AccountOut)
-async def statement(account_id: str, current_user: Dict = Depends(get_current_user)):
-    account = accounts.get(account_id)
+    return await _idempotent(current_user, idempotency_key, ("withdraw", account["id"], amount), apply)
+
+
+@app.post("/transactions/transfer", response_model=TransferOut)
+async def transfer(
+    payload: TransferCreate,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: Dict = Depends(get_current_user),
+):
+    amount = _amount_cents(payload.amount)
+    source = get_owned_account(payload.from_account_id, current_user)
+    target = accounts.get(payload.to_account_id)
+    if not target:
+        raise HTTPException(status_code=404, detail="Destination account not found")
+    if target is source:
+        raise HTTPException(status_code=400, detail="Cannot transfer to the same account")
+    limit_account(source["id"])
+
+    async def apply():
+        # lock_many trava as duas contas em ordem de id: transferências cruzadas A->B e B->A não se bloqueiam
+        async with account_locks.lock_many([source["id"], target["id"]]):
+            if amount > source["balance_cents"]:
+                raise HTTPException(status_code=400, detail="Insufficient balance")
+            # checado antes do débito: o crédito não pode falhar depois que a origem já mudou
+            if target["balance_cents"] + amount > INT64_MAX:
+                raise HTTPException(status_code=400, detail="Balance limit exceeded")
+            debit = _apply_tx(source, "TransferOut", amount)
+            credit = _apply_tx(target, "TransferIn", amount)
+            # débito e crédito num único evento do ledger: no replay entram juntos
+            await _persist(
+                {"op": "batch", "txs": [
+                    {"account_id": source["id"], "balance_cents": source["balance_cents"], "tx": debit},
+                    {"account_id": target["id"], "balance_cents": target["balance_cents"], "tx": credit},
+                ]},
+                lambda: _revert_txs([(source, debit), (target, credit)]),
+            )
+        return TransferOut(debit=_transaction_out(debit), credit=_transaction_out(credit))
+
+    fingerprint = ("transfer", source["id"], target["id"], amount)
+    return await _idempotent(current_user, idempotency_key, fingerprint, apply)
+
+
+def _plan_batch_item(item: BatchItem, username: str, balances: Dict[str, int]):
+    # valida um item contra os saldos simulados do lote; devolve [(conta, tipo, centavos)] ou uma mensagem de erro
+    cents = to_cents(item.amount)
+    if cents <= 0:
+        return "Amount must be positive"
+    account = accounts.get(item.account_id)
     if not account:
-        raise HTTPException(status_code=404, detail="Account not found")
-    if account["owner"] != current_user["username"]:
-        raise HTTPException(status_code=403, detail="Not authorized for this account")
-    return AccountOut(**account)
+        return "Account not found"
+    if account["owner"] != username:
+        return "Not authorized for this account"
+    if item.type == "deposit":
+        if balances[item.account_id] + cents > INT64_MAX:
+            return "Balance limit exceeded"
+        return [(item.account_id, "Deposit", cents)]
+    if cents > balances[item.account_id]:
+        return "Insufficient balance"
+    if item.type == "withdraw":
+        return [(item.account_id, "Withdraw", cents)]
+    if item.to_account_id not in accounts or item.to_account_id == item.account_id:
+        return "Invalid destination account"
+    if balances[item.to_account_id] + cents > INT64_MAX:
+        return "Balance limit exceeded"
+    return [(item.account_id, "TransferOut", cents), (item.to_account_id, "TransferIn", cents)]
+
+
+@app.post("/transactions/batch")
+async def batch_transactions(payload: BatchCreate, current_user: Dict = Depends(get_current_user)):
+    if not payload.items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(payload.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
+    atomic = (payload.mode or BATCH_MODE) == "atomic"
+    touched = set()
+    for item in payload.items:
+        touched.add(item.account_id)
+        if item.to_account_id:
+            touched.add(item.to_account_id)
+    touched = [account_id for account_id in touched if account_id in accounts]
+    # só as contas do próprio usuário gastam o orçamento por conta: citar a conta de outro (como destino
+    # ou num item que vai falhar) não pode esgotar o limite do dono
+    for account_id in touched:
+        if accounts[account_id]["owner"] == current_user["username"]:
+            limit_account(account_id)
+
+    # um JWT, um lock_many e um evento de ledger para o lote inteiro; os itens são aplicados na ordem do pedido
+    async with account_locks.lock_many(touched):
+        balances = {account_id: accounts[account_id]["balance_cents"] for account_id in touched}
+        plans = []
+        for item in payload.items:
+            plan = _plan_batch_item(item, current_user["username"], balances)
+            if isinstance(plan, list):
+                for account_id, t_type, cents in plan:
+                    balances[account_id] += TX_SIGNS[t_type] * cents
+            plans.append(plan)
+        failed = sum(isinstance(plan, str) for plan in plans)
+        if atomic and failed:
+            return JSONResponse(
+                status_code=400,
+                content={
+                    "applied": 0,
+                    "failed": failed,
+                    "results": [{"error": plan} if isinstance(plan, str) else {} for plan in plans],
+                },
+            )
+
+        results = []
+        txs = []
+        applied = []
+        for plan in plans:
+            if isinstance(plan, str):
+                results.append({"error": plan})
+                continue
+            for account_id, t_type, cents in plan:
+                account = accounts[account_id]
+                tr = _apply_tx(account, t_type, cents)
+                applied.append((account, tr))
+                txs.append({"account_id": account_id, "balance_cents": account["balance_cents"], "tx": tr})
+            # no transfer, o id devolvido é o da saída (TransferOut)
+            results.append({"id": txs[-len(plan)]["tx"]["id"]})
+        if txs:
+            await _persist({"op": "batch", "txs": txs}, lambda: _revert_txs(applied))
+    return {"applied": len(plans) - failed, "failed": failed, "results": results}
+
+
+# ----------------- Statement -----------------
+STATEMENT_EXPORT_CHUNK = 500
+CSV_FIELDS = ("id", "type", "amount", "date")
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # datas das transações são UTC sem tzinfo
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _transaction_dict(tr: Dict) -> Dict:
+    return {"id": tr["id"], "type": tr["type"], "amount": from_cents(tr["amount_cents"]), "date": tr["date"].isoformat()}
+
+
+async def _export_statement(transactions: TransactionStore, lo: int, hi: int, export: str):
+    # gera o arquivo em blocos; nunca monta o histórico inteiro em memória
+    if export == "csv":
+        yield ",".join(CSV_FIELDS) + "\n"
+    for start in range(lo, hi, STATEMENT_EXPORT_CHUNK):
+        chunk = transactions[start:min(start + STATEMENT_EXPORT_CHUNK, hi)]
+        if export == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf, lineterminator="\n")
+            for tr in chunk:
+                d = _transaction_dict(tr)
+                writer.writerow([d[f] for f in CSV_FIELDS])
+            yield buf.getvalue()
+        else:
+            yield "".join(json.dumps(_transaction_dict(tr)) + "\n" for tr in chunk)
+        await asyncio.sleep(0)
+
+
+@app.get("/accounts/{account_id}/statement", response_model=StatementOut)
+async def statement(
+    account_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    export: Optional[Literal["ndjson", "csv"]] = None,
+    current_user: Dict = Depends(get_current_user),
+):
+    account = get_owned_account(account_id, current_user)
+
+    transactions = account["transactions"]
+    # intervalo [start, end) por busca binária; o fim é fixado agora, então transações novas não entram
+    lo = transactions.index_at(_naive_utc(start)) if start else 0
+    hi = transactions.index_at(_naive_utc(end)) if end else len(transactions)
+    if cursor is not None:
+        if not cursor.isdigit():
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        lo = max(lo, int(cursor))
+    page_end = min(hi, lo + limit) if limit else hi
+
+    if export:
+        media_type = "text/csv" if export == "csv" else "application/x-ndjson"
+        return StreamingResponse(_export_statement(transactions, lo, page_end, export), media_type=media_type)
+
+    next_cursor = str(page_end) if page_end < hi else None
+    if FAST_JSON:
+        return FastJSONResponse(
+            dict(_account_summary(account), transactions=transactions.rows(lo, page_end), next_cursor=next_cursor)
+        )
+    return StatementOut(
+        id=account["id"],
+        owner=account["owner"],
+        balance=from_cents(account["balance_cents"]),
+        nickname=account["nickname"],
+        transactions=[_transaction_out(tr) for tr in transactions[lo:page_end]],
+        next_cursor=next_cursor,
+    )
+
+
+@app.get("/accounts/{account_id}/balance")
+async def balance_at(account_id: str, at: Optional[datetime] = None, current_user: Dict = Depends(get_current_user)):
+    account = get_owned_account(account_id, current_user)
+    if at is None:
+        return {"account_id": account_id, "balance": from_cents(account["balance_cents"]), "at": datetime.utcnow()}
+    at = _naive_utc(at)
+    return {"account_id": account_id, "balance": from_cents(account["transactions"].balance_at(at)), "at": at}
@@ -0,0 +1,53 @@
+import asyncio
+import importlib.util
+import os
+
+import httpx
+import pytest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def load_app(monkeypatch, **env):
+    # app.py guarda o estado em variáveis de módulo: cada carga devolve uma cópia nova
+    monkeypatch.setenv("STORAGE_BACKEND", "memory")
+    monkeypatch.setenv("RATE_LIMIT_ENABLED", "0")
+    for name, value in env.items():
+        monkeypatch.setenv(name, str(value))
+    spec = importlib.util.spec_from_file_location("bank_app", APP_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def client_of(module):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=module.app), base_url="http://test")
+
+
+@pytest.fixture
+def bank(monkeypatch):
+    module = load_app(monkeypatch)
+
+    class SlowStorage(module.Storage):
+        # simula a espera do fsync: outras requisições rodam enquanto a conta está travada
+        async def persist(self, event):
+            await asyncio.sleep(0.001)
+
+    module.storage = SlowStorage()
+    return module
+
+
+@pytest.fixture
+def client_for(bank):
+    def factory():
+        return client_of(bank)
+
+    return factory
+
+
+async def open_account(client, username="ana", password="1234"):
+    await client.post("/signup", json={"username": username, "password": password})
+    token = (await client.post("/token", data={"username": username, "password": password})).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    account = (await client.post("/accounts", json={}, headers=headers)).json()
+    return headers, account["id"]
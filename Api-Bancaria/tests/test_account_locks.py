@@ -0,0 +1,49 @@
+import asyncio
+
+from conftest import open_account
+
+
+def test_parallel_withdrawals_never_overdraw(bank, client_for):
+    async def scenario():
+        async with client_for() as client:
+            headers, account_id = await open_account(client)
+            await client.post("/transactions/deposit", json={"account_id": account_id, "amount": 100}, headers=headers)
+            responses = await asyncio.gather(*[
+                client.post("/transactions/withdraw", json={"account_id": account_id, "amount": 7}, headers=headers)
+                for _ in range(50)
+            ])
+            return account_id, responses
+
+    account_id, responses = asyncio.run(scenario())
+    codes = [r.status_code for r in responses]
+    account = bank.accounts[account_id]
+
+    assert set(codes) <= {200, 400}
+    assert codes.count(200) == 14
+    assert account["balance_cents"] == 200
+    # o saldo bate com o histórico e nenhum lock ficou para trás
+    assert account["transactions"].balance_before(len(account["transactions"])) == 200
+    assert bank.account_locks._locks == {}
+
+
+def test_parallel_deposits_and_withdrawals_keep_balance_consistent(bank, client_for):
+    async def scenario():
+        async with client_for() as client:
+            headers, account_id = await open_account(client)
+            operations = []
+            for i in range(100):
+                kind = "deposit" if i % 2 == 0 else "withdraw"
+                operations.append(client.post(
+                    f"/transactions/{kind}", json={"account_id": account_id, "amount": 3}, headers=headers
+                ))
+            return account_id, await asyncio.gather(*operations)
+
+    account_id, responses = asyncio.run(scenario())
+    account = bank.accounts[account_id]
+    applied = {"Deposit": 0, "Withdraw": 0}
+    for tr in account["transactions"]:
+        applied[tr["type"]] += 1
+
+    assert applied["Deposit"] == 50
+    assert applied["Withdraw"] == sum(r.status_code == 200 for r in responses) - 50
+    assert account["balance_cents"] == (applied["Deposit"] - applied["Withdraw"]) * 300 >= 0
@@ -0,0 +1,82 @@
+import asyncio
+
+from conftest import open_account
+
+
+def test_concurrent_duplicates_apply_once(bank, client_for):
+    async def scenario():
+        async with client_for() as client:
+            headers, account_id = await open_account(client)
+            headers = dict(headers, **{"Idempotency-Key": "pagamento-1"})
+            responses = await asyncio.gather(*[
+                client.post("/transactions/deposit", json={"account_id": account_id, "amount": 5}, headers=headers)
+                for _ in range(50)
+            ])
+            return account_id, responses
+
+    account_id, responses = asyncio.run(scenario())
+
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert bank.accounts[account_id]["balance_cents"] == 500
+    assert len(bank.accounts[account_id]["transactions"]) == 1
+
+
+def test_key_reused_with_different_request_is_rejected(bank, client_for):
+    async def scenario():
+        async with client_for() as client:
+            headers, account_id = await open_account(client)
+            headers = dict(headers, **{"Idempotency-Key": "k"})
+            first = await client.post(
+                "/transactions/deposit", json={"account_id": account_id, "amount": 5}, headers=headers
+            )
+            second = await client.post(
+                "/transactions/deposit", json={"account_id": account_id, "amount": 6}, headers=headers
+            )
+            return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first.status_code == 200
+    assert second.status_code == 422
+
+
+def test_failed_request_is_not_cached(bank, client_for):
+    async def scenario():
+        async with client_for() as client:
+            headers, account_id = await open_account(client)
+            keyed = dict(headers, **{"Idempotency-Key": "saque-1"})
+            payload = {"account_id": account_id, "amount": 10}
+            refused = await client.post("/transactions/withdraw", json=payload, headers=keyed)
+            await client.post("/transactions/deposit", json={"account_id": account_id, "amount": 20}, headers=headers)
+            retried = await asyncio.gather(*[
+                client.post("/transactions/withdraw", json=payload, headers=keyed) for _ in range(10)
+            ])
+            return account_id, refused, retried
+
+    account_id, refused, retried = asyncio.run(scenario())
+
+    assert refused.status_code == 400
+    assert {r.status_code for r in retried} == {200}
+    assert bank.accounts[account_id]["balance_cents"] == 1000
+
+
+def test_store_is_bounded_and_expires(bank):
+    async def scenario():
+        store = bank.IdempotencyStore(maxsize=3, ttl=0.05)
+
+        async def ok():
+            return "ok"
+
+        for i in range(5):
+            await store.run(("ana", str(i)), (), ok)
+        size_after_fill = len(store._entries)
+        await asyncio.sleep(0.06)
+        await store.run(("ana", "late"), (), ok)
+        return store, size_after_fill
+
+    store, size_after_fill = asyncio.run(scenario())
+
+    assert size_after_fill == 3
+    assert len(store._entries) == 1
+    assert store.evictions == 5
@@ -0,0 +1,41 @@
+import os
+import random
+from decimal import Decimal
+
+# PROPERTY_TEST_OPS=2000000 para a rodada longa
+OPS = int(os.getenv("PROPERTY_TEST_OPS", "50000"))
+
+
+def random_amount(rng):
+    # como o schema aceita: até 2 casas decimais
+    return Decimal(rng.randint(1, 10**9)) / 100
+
+
+def test_integer_cents_match_decimal_reference(bank):
+    rng = random.Random(16)
+    account = {"id": "acc", "balance_cents": 0, "transactions": bank.TransactionStore()}
+    reference = Decimal(0)
+    prefix = [Decimal(0)]  # saldo de referência antes de cada transação
+    for _ in range(OPS):
+        amount = random_amount(rng)
+        if rng.random() < 0.5 or amount > reference:
+            bank._apply_tx(account, "Deposit", bank.to_cents(amount))
+            reference += amount
+        else:
+            bank._apply_tx(account, "Withdraw", bank.to_cents(amount))
+            reference -= amount
+        prefix.append(reference)
+        if rng.random() < 0.01:
+            # desfaz as últimas transações, como numa falha de gravação
+            drop = rng.randint(1, min(5, len(prefix) - 1))
+            applied = [(account, tr) for tr in account["transactions"][-drop:]]
+            bank._revert_txs(applied)
+            del prefix[-drop:]
+            reference = prefix[-1]
+        assert Decimal(account["balance_cents"]) / 100 == reference
+
+    transactions = account["transactions"]
+    assert len(transactions) == len(prefix) - 1
+    assert bank.from_cents(account["balance_cents"]) == float(reference)
+    for index in rng.sample(range(len(prefix)), min(len(prefix), 500)):
+        assert Decimal(transactions.balance_before(index)) / 100 == prefix[index]
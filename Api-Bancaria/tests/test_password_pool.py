@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+from conftest import client_of, load_app, open_account
+
+HASH_SECONDS = 0.2
+
+
+def slow_verify(bank):
+    real_verify = bank.verify_password
+
+    def verify(plain_password, hashed_password):
+        # bcrypt libera o GIL; time.sleep faz o mesmo, com custo previsível
+        time.sleep(HASH_SECONDS)
+        return real_verify(plain_password, hashed_password)
+
+    return verify
+
+
+def test_deposits_stay_fast_during_login_storm(monkeypatch):
+    bank = load_app(monkeypatch, PASSWORD_HASH_WORKERS=2, PASSWORD_HASH_MAX_PENDING=8)
+
+    async def scenario():
+        async with client_of(bank) as client:
+            headers, account_id = await open_account(client)
+            monkeypatch.setattr(bank, "verify_password", slow_verify(bank))
+            logins = [
+                asyncio.ensure_future(client.post("/token", data={"username": "ana", "password": "1234"}))
+                for _ in range(8)
+            ]
+            await asyncio.sleep(0)
+            latencies = []
+            while not all(login.done() for login in logins):
+                start = time.perf_counter()
+                response = await client.post(
+                    "/transactions/deposit", json={"account_id": account_id, "amount": 1}, headers=headers
+                )
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200
+                await asyncio.sleep(0.005)  # um cliente por vez, em ritmo constante
+            return [login.result().status_code for login in logins], latencies
+
+    codes, latencies = asyncio.run(scenario())
+    assert codes == [200] * 8
+    # 8 verificações em 2 threads levam ~0.8s; nenhum depósito espera por uma delas
+    assert len(latencies) > 10
+    assert max(latencies) < HASH_SECONDS / 2
+
+
+def test_login_over_pending_limit_gets_503_with_retry_after(monkeypatch):
+    bank = load_app(monkeypatch, PASSWORD_HASH_WORKERS=2, PASSWORD_HASH_MAX_PENDING=2)
+
+    async def scenario():
+        async with client_of(bank) as client:
+            await client.post("/signup", json={"username": "ana", "password": "1234"})
+            monkeypatch.setattr(bank, "verify_password", slow_verify(bank))
+            return await asyncio.gather(*[
+                client.post("/token", data={"username": "ana", "password": "1234"}) for _ in range(5)
+            ])
+
+    responses = asyncio.run(scenario())
+    codes = [r.status_code for r in responses]
+    assert codes.count(200) == 2
+    assert codes.count(503) == 3
+    assert all(r.headers["Retry-After"] == "1" for r in responses if r.status_code == 503)
+    assert bank._hash_pending == 0
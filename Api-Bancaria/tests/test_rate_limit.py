@@ -0,0 +1,50 @@
+import asyncio
+
+import httpx
+
+from conftest import load_app
+
+
+def client_from(module, ip):
+    transport = httpx.ASGITransport(app=module.app, client=(ip, 1234))
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+def test_login_attempts_are_limited_per_username_across_ips(monkeypatch):
+    bank = load_app(monkeypatch, RATE_LIMIT_ENABLED=1, RATE_LIMIT_AUTH="0.01,3")
+
+    async def scenario():
+        async with client_from(bank, "10.0.0.1") as client:
+            assert (await client.post("/signup", json={"username": "ana", "password": "1234"})).status_code == 201
+        codes = []
+        for i in range(4):
+            async with client_from(bank, f"10.0.1.{i}") as client:
+                response = await client.post("/token", data={"username": "ana", "password": "errada"})
+                codes.append(response.status_code)
+        return codes, response
+
+    codes, last = asyncio.run(scenario())
+    # o signup já gastou uma ficha do usuário; cada IP novo tem o próprio bucket cheio
+    assert codes == [401, 401, 429, 429]
+    assert "Retry-After" in last.headers
+
+
+def test_transaction_budget_per_user_without_token_cache(monkeypatch):
+    bank = load_app(monkeypatch, RATE_LIMIT_ENABLED=1, RATE_LIMIT_TRANSACTION="0.01,2", TOKEN_CACHE_SIZE=0)
+
+    async def scenario():
+        async with client_from(bank, "10.0.0.1") as client:
+            await client.post("/signup", json={"username": "ana", "password": "1234"})
+            token = (await client.post("/token", data={"username": "ana", "password": "1234"})).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+            account_id = (await client.post("/accounts", json={}, headers=headers)).json()["id"]
+        codes = []
+        for i in range(3):
+            async with client_from(bank, f"10.0.2.{i}") as client:
+                response = await client.post(
+                    "/transactions/deposit", json={"account_id": account_id, "amount": 1}, headers=headers
+                )
+                codes.append(response.status_code)
+        return codes
+
+    assert asyncio.run(scenario()) == [200, 200, 429]
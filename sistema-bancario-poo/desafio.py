@@ -1,6 +1,9 @@
 import textwrap
 from abc import ABC, abstractmethod
-from datetime import datetime
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
 
 
 # ===================== MENU =====================
@@ -18,19 +21,102 @@ def menu():
     return input(textwrap.dedent(menu))
 
 
+# ===================== DINHEIRO =====================
+# valores circulam como inteiros em centavos: a conversão com Decimal acontece uma vez na
+# entrada (main) e outra na exibição. O histórico guarda cada valor em int64
+CENTAVOS_MAXIMO = 2**63 - 1
+
+
+def centavos(valor):
+    try:
+        valor = Decimal(str(valor)) * 100
+    except InvalidOperation:
+        return None
+    # Infinity/NaN e mais de 2 casas decimais não são valores válidos
+    if not valor.is_finite() or valor != valor.to_integral_value():
+        return None
+    if abs(valor) > CENTAVOS_MAXIMO:
+        return None
+    return int(valor)
+
+
+def reais(centavos):
+    return Decimal(centavos) / 100
+
+
 # ===================== HISTÓRICO =====================
+TIPOS = ("Deposito", "Saque")
+CODIGO_TIPO = {tipo: codigo for codigo, tipo in enumerate(TIPOS)}
+
+
 class Historico:
-    def __init__(self):
-        self.transacoes = []
+    # colunas compactas (timestamp, código do tipo, centavos); a formatação só acontece no extrato
+    def __init__(self, janela=timedelta(hours=24)):
+        self._datas = array("d")
+        self._tipos = array("b")
+        self._valores = array("q")
+        # contadores mantidos a cada adição: consultar não percorre o histórico
+        self._por_dia = {}  # (tipo, dia) -> quantidade
+        # por tipo: primeiro índice ainda dentro da janela e quantas entradas do tipo estão nela
+        self._inicio_janela = [0] * len(TIPOS)
+        self._na_janela = [0] * len(TIPOS)
+        self.janela = janela
 
     def adicionar(self, transacao):
-        self.transacoes.append(
-            {
-                "tipo": transacao.__class__.__name__,
-                "valor": transacao.valor,
-                "data": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+        # valida antes de escrever: uma falha não deixa as colunas com tamanhos diferentes
+        valor = transacao.valor
+        if not 0 <= valor <= CENTAVOS_MAXIMO:
+            raise ValueError(f"Valor inválido para o histórico: {valor}")
+        agora = datetime.now()
+        tipo = transacao.__class__.__name__
+        codigo = CODIGO_TIPO[tipo]
+        self._datas.append(agora.timestamp())
+        self._tipos.append(codigo)
+        self._valores.append(valor)
+        chave = (tipo, agora.date())
+        self._por_dia[chave] = self._por_dia.get(chave, 0) + 1
+        self._na_janela[codigo] += 1
+        self._podar(codigo, self._datas[-1])
+
+    def __len__(self):
+        return len(self._datas)
+
+    def gerar_relatorio(self, tipo=None, inicio=None, fim=None):
+        # gerador com filtro por tipo e intervalo [inicio, fim); as entradas são anexadas em ordem
+        # cronológica, então o intervalo é achado por busca binária
+        codigo = CODIGO_TIPO[tipo] if tipo else None
+        primeiro = bisect_left(self._datas, inicio.timestamp()) if inicio else 0
+        ultimo = bisect_left(self._datas, fim.timestamp()) if fim else len(self)
+        for i in range(primeiro, ultimo):
+            if codigo is not None and self._tipos[i] != codigo:
+                continue
+            yield {
+                "tipo": TIPOS[self._tipos[i]],
+                "valor": reais(self._valores[i]),
+                "data": datetime.fromtimestamp(self._datas[i]).strftime("%d/%m/%Y %H:%M:%S"),
             }
-        )
+
+    @property
+    def transacoes(self):
+        return list(self.gerar_relatorio())
+
+    def _podar(self, codigo, agora):
+        # avança o início da janela; cada entrada é visitada uma única vez por tipo
+        inicio = agora - self.janela.total_seconds()
+        i = self._inicio_janela[codigo]
+        while i < len(self._datas) and self._datas[i] <= inicio:
+            if self._tipos[i] == codigo:
+                self._na_janela[codigo] -= 1
+            i += 1
+        self._inicio_janela[codigo] = i
+
+    def quantidade_no_dia(self, tipo, dia=None):
+        return self._por_dia.get((tipo, dia or date.today()), 0)
+
+    def quantidade_na_janela(self, tipo):
+        codigo = CODIGO_TIPO[tipo]
+        self._podar(codigo, datetime.now().timestamp())
+        return self._na_janela[codigo]
 
 
 # ===================== TRANSAÇÃO =====================
@@ -41,6 +127,7 @@ class Transacao(ABC):
 
 
 class Deposito(Transacao):
+    # valor em centavos
     def __init__(self, valor):
         self.valor = valor
 
@@ -51,6 +138,7 @@ class Deposito(Transacao):
 
 
 class Saque(Transacao):
+    # valor em centavos
     def __init__(self, valor):
         self.valor = valor
 
@@ -63,53 +151,73 @@ class Saque(Transacao):
 # ===================== CONTA =====================
 class Conta:
     def __init__(self, cliente, numero, agencia="0001"):
-        self.saldo = 0
+        self._saldo = 0
         self.numero = numero
         self.agencia = agencia
         self.cliente = cliente
         self.historico = Historico()
 
+    @property
+    def saldo(self):
+        # em centavos; reais(conta.saldo) para exibir
+        return self._saldo
+
     def sacar(self, valor):
-        if valor <= 0:
+        if not 0 < valor <= CENTAVOS_MAXIMO:
             print("\n@@@ Valor inválido! @@@")
             return False
 
-        if valor > self.saldo:
+        if valor > self._saldo:
             print("\n@@@ Saldo insuficiente! @@@")
             return False
 
-        self.saldo -= valor
+        self._saldo -= valor
         return True
 
     def depositar(self, valor):
-        if valor <= 0:
+        if not 0 < valor <= CENTAVOS_MAXIMO:
             print("\n@@@ Valor inválido! @@@")
             return False
 
-        self.saldo += valor
+        self._saldo += valor
         return True
 
 
 # ===================== CONTA CORRENTE =====================
 class ContaCorrente(Conta):
-    def __init__(self, cliente, numero, limite=500, limite_saques=3):
-        super().__init__(cliente, numero)
-        self.limite = limite
+    def __init__(
+        self,
+        cliente,
+        numero,
+        limite=50000,
+        limite_saques=3,
+        limite_saques_janela=None,
+        janela=timedelta(hours=24),
+        agencia="0001",
+    ):
+        super().__init__(cliente, numero, agencia)
+        self.limite = limite  # centavos por saque
+        # limite_saques vale por dia; limite_saques_janela (opcional) vale para as últimas `janela` horas
         self.limite_saques = limite_saques
+        self.limite_saques_janela = limite_saques_janela
+        self.historico.janela = janela
 
     def sacar(self, valor):
-        quantidade_saques = len(
-            [t for t in self.historico.transacoes if t["tipo"] == "Saque"]
-        )
-
         if valor > self.limite:
             print("\n@@@ Limite de saque excedido! @@@")
             return False
 
-        if quantidade_saques >= self.limite_saques:
+        if self.historico.quantidade_no_dia("Saque") >= self.limite_saques:
             print("\n@@@ Número máximo de saques excedido! @@@")
             return False
 
+        if (
+            self.limite_saques_janela is not None
+            and self.historico.quantidade_na_janela("Saque") >= self.limite_saques_janela
+        ):
+            print("\n@@@ Número máximo de saques no período excedido! @@@")
+            return False
+
         return super().sacar(valor)
 
 
@@ -135,10 +243,69 @@ class PessoaFisica(Cliente):
         self.data_nascimento = data_nascimento
 
 
+# ===================== BANCO =====================
+class Banco:
+    # registros indexados: cliente por CPF e conta por (agência, número), busca O(1)
+    def __init__(self):
+        self._clientes = {}
+        self._contas = {}
+        self._proximo_numero = {}  # agência -> próximo número livre
+
+    def adicionar_cliente(self, cliente):
+        if cliente.cpf in self._clientes:
+            return False
+        self._clientes[cliente.cpf] = cliente
+        return True
+
+    def buscar_cliente(self, cpf):
+        return self._clientes.get(cpf)
+
+    def proximo_numero(self, agencia="0001"):
+        return self._proximo_numero.get(agencia, 1)
+
+    def adicionar_conta(self, conta):
+        chave = (conta.agencia, conta.numero)
+        if chave in self._contas:
+            return False
+        self._contas[chave] = conta
+        conta.cliente.adicionar_conta(conta)
+        # números removidos não são reaproveitados
+        self._proximo_numero[conta.agencia] = max(self.proximo_numero(conta.agencia), conta.numero + 1)
+        return True
+
+    def buscar_conta(self, numero, agencia="0001"):
+        return self._contas.get((agencia, numero))
+
+    def remover_conta(self, numero, agencia="0001"):
+        conta = self._contas.pop((agencia, numero), None)
+        if conta is not None:
+            conta.cliente.contas.remove(conta)
+        return conta
+
+    def contas(self):
+        return iter(self._contas.values())
+
+    def carregar(self, clientes=(), contas=()):
+        # carga em lote: valida unicidade de tudo antes de alterar os índices
+        novos_clientes = {}
+        for cliente in clientes:
+            if cliente.cpf in self._clientes or cliente.cpf in novos_clientes:
+                raise ValueError(f"CPF duplicado: {cliente.cpf}")
+            novos_clientes[cliente.cpf] = cliente
+        novas_contas = {}
+        for conta in contas:
+            chave = (conta.agencia, conta.numero)
+            if chave in self._contas or chave in novas_contas:
+                raise ValueError(f"Conta duplicada: agência {conta.agencia}, número {conta.numero}")
+            novas_contas[chave] = conta
+        self._clientes.update(novos_clientes)
+        for conta in novas_contas.values():
+            self.adicionar_conta(conta)
+
+
 # ===================== MAIN =====================
 def main():
-    clientes = []
-    contas = []
+    banco = Banco()
 
     while True:
         opcao = menu()
@@ -146,7 +313,7 @@ def main():
         if opcao == "nu":
             cpf = input("Informe o CPF: ")
 
-            if any(cliente.cpf == cpf for cliente in clientes):
+            if banco.buscar_cliente(cpf):
                 print("\n@@@ Usuário já cadastrado! @@@")
                 continue
 
@@ -154,56 +321,69 @@ def main():
             nascimento = input("Informe a data de nascimento (dd-mm-aaaa): ")
             endereco = input("Informe o endereço: ")
 
-            cliente = PessoaFisica(nome, cpf, nascimento, endereco)
-            clientes.append(cliente)
+            banco.adicionar_cliente(PessoaFisica(nome, cpf, nascimento, endereco))
 
             print("\n=== Usuário criado com sucesso! ===")
 
         elif opcao == "nc":
             cpf = input("Informe o CPF do usuário: ")
-            cliente = next((c for c in clientes if c.cpf == cpf), None)
+            cliente = banco.buscar_cliente(cpf)
 
             if not cliente:
                 print("\n@@@ Usuário não encontrado! @@@")
                 continue
 
-            numero = len(contas) + 1
-            conta = ContaCorrente(cliente, numero)
-            cliente.adicionar_conta(conta)
-            contas.append(conta)
+            banco.adicionar_conta(ContaCorrente(cliente, banco.proximo_numero()))
 
             print("\n=== Conta criada com sucesso! ===")
 
         elif opcao == "d":
             numero = int(input("Informe o número da conta: "))
-            valor = float(input("Informe o valor do depósito: "))
+            valor = centavos(input("Informe o valor do depósito: "))
+            if valor is None:
+                print("\n@@@ Valor inválido! @@@")
+                continue
+
+            conta = banco.buscar_conta(numero)
+            if not conta:
+                print("\n@@@ Conta não encontrada! @@@")
+                continue
 
-            conta = contas[numero - 1]
             conta.cliente.realizar_transacao(conta, Deposito(valor))
 
         elif opcao == "s":
             numero = int(input("Informe o número da conta: "))
-            valor = float(input("Informe o valor do saque: "))
+            valor = centavos(input("Informe o valor do saque: "))
+            if valor is None:
+                print("\n@@@ Valor inválido! @@@")
+                continue
+
+            conta = banco.buscar_conta(numero)
+            if not conta:
+                print("\n@@@ Conta não encontrada! @@@")
+                continue
 
-            conta = contas[numero - 1]
             conta.cliente.realizar_transacao(conta, Saque(valor))
 
         elif opcao == "e":
             numero = int(input("Informe o número da conta: "))
-            conta = contas[numero - 1]
+            conta = banco.buscar_conta(numero)
+            if not conta:
+                print("\n@@@ Conta não encontrada! @@@")
+                continue
 
             print("\n================ EXTRATO ================")
-            if not conta.historico.transacoes:
+            if not len(conta.historico):
                 print("Não foram realizadas movimentações.")
             else:
-                for t in conta.historico.transacoes:
+                for t in conta.historico.gerar_relatorio():
                     print(f"{t['tipo']}:\tR$ {t['valor']:.2f} - {t['data']}")
 
-            print(f"\nSaldo:\tR$ {conta.saldo:.2f}")
+            print(f"\nSaldo:\tR$ {reais(conta.saldo):.2f}")
             print("========================================")
 
         elif opcao == "lc":
-            for conta in contas:
+            for conta in banco.contas():
                 print("=" * 40)
                 print(f"Agência:\t{conta.agencia}")
                 print(f"Conta:\t\t{conta.numero}")
@@ -217,4 +397,5 @@ def main():
             print("\n@@@ Operação inválida! @@@")
 
 
-main()
+if __name__ == "__main__":
+    main()
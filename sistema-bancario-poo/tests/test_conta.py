@@ -0,0 +1,48 @@
+import importlib.util
+import os
+import random
+from decimal import Decimal
+
+import pytest
+
+DESAFIO_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "desafio.py")
+# PROPERTY_TEST_OPS=2000000 para a rodada longa
+OPS = int(os.getenv("PROPERTY_TEST_OPS", "50000"))
+
+
+@pytest.fixture
+def desafio():
+    spec = importlib.util.spec_from_file_location("desafio", DESAFIO_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_saldo_em_centavos_bate_com_referencia_decimal(desafio, capsys):
+    rng = random.Random(16)
+    conta = desafio.Conta(None, 1)
+    referencia = Decimal(0)
+    for _ in range(OPS):
+        texto = f"{rng.randint(1, 10**9) / 100:.2f}"
+        valor = Decimal(texto)
+        if rng.random() < 0.5:
+            desafio.Deposito(desafio.centavos(texto)).registrar(conta)
+            referencia += valor
+        else:
+            desafio.Saque(desafio.centavos(texto)).registrar(conta)
+            if valor <= referencia:
+                referencia -= valor
+        assert desafio.reais(conta.saldo) == referencia
+    capsys.readouterr()
+
+    total = sum(
+        t["valor"] if t["tipo"] == "Deposito" else -t["valor"] for t in conta.historico.gerar_relatorio()
+    )
+    assert total == referencia
+
+
+def test_centavos_rejeita_valores_fora_do_formato(desafio):
+    assert desafio.centavos("10.25") == 1025
+    assert desafio.centavos("0.1") == 10
+    for texto in ("1.005", "abc", "Infinity", "NaN", str(2**63)):
+        assert desafio.centavos(texto) is None
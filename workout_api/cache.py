@@ -0,0 +1,163 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# tabelas pequenas e quase só de leitura (categoria, centro_treinamento): id -> nome em memória
+LOOKUP_CACHE_MAXSIZE = int(os.getenv("WORKOUT_LOOKUP_CACHE_SIZE", "0")) or None
+LOOKUP_CACHE_TTL = float(os.getenv("WORKOUT_LOOKUP_CACHE_TTL", "0")) or None
+
+
+class LookupCache:
+    # LRU opcionalmente limitado por tamanho e por TTL; thread-safe (endpoints síncronos rodam no threadpool)
+    def __init__(self, nome: str, maxsize: int = None, ttl: float = None):
+        self.nome = nome
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get_many(self, ids):
+        # devolve (encontrados, faltantes); faltantes devem ser buscados no banco e gravados com put_many
+        agora = time.monotonic()
+        encontrados = {}
+        faltantes = set()
+        with self._lock:
+            for i in ids:
+                if i is None or i in encontrados or i in faltantes:
+                    continue
+                entrada = self._dados.get(i)
+                if entrada is not None and (self.ttl is None or entrada[1] > agora):
+                    self._dados.move_to_end(i)
+                    encontrados[i] = entrada[0]
+                    self.hits += 1
+                else:
+                    if entrada is not None:
+                        del self._dados[i]
+                    faltantes.add(i)
+                    self.misses += 1
+        return encontrados, faltantes
+
+    def put_many(self, valores: dict):
+        expira = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            for chave, valor in valores.items():
+                self._dados[chave] = (valor, expira)
+                self._dados.move_to_end(chave)
+            if self.maxsize is not None:
+                while len(self._dados) > self.maxsize:
+                    self._dados.popitem(last=False)
+
+    def invalidate(self, chave=None):
+        with self._lock:
+            self.invalidations += 1
+            if chave is None:
+                self._dados.clear()
+            else:
+                self._dados.pop(chave, None)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._dados),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+categorias = LookupCache("categoria", maxsize=LOOKUP_CACHE_MAXSIZE, ttl=LOOKUP_CACHE_TTL)
+centros = LookupCache("centro_treinamento", maxsize=LOOKUP_CACHE_MAXSIZE, ttl=LOOKUP_CACHE_TTL)
+
+
+def lookup_stats():
+    return {c.nome: c.stats() for c in (categorias, centros)}
+
+
+class TableVersion:
+    # contador incrementado a cada escrita deste processo; respostas em cache de versões antigas deixam de valer.
+    # Escritas de outros processos (CLI de importação, outros workers) não passam por aqui: com ttl a versão
+    # também muda a cada `ttl` segundos, o que limita por quanto tempo uma resposta pode ficar desatualizada
+    def __init__(self, ttl: float = None):
+        self._lock = threading.Lock()
+        self._count = 0
+        self.ttl = ttl
+
+    @property
+    def value(self) -> str:
+        if self.ttl is None:
+            return str(self._count)
+        return f"{self._count}.{int(time.time() // self.ttl)}"
+
+    def bump(self):
+        with self._lock:
+            self._count += 1
+
+
+class ResponseCache:
+    # LRU de respostas serializadas, cada uma marcada com a versão da tabela em que foi gerada
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def get(self, chave, versao: str):
+        with self._lock:
+            entrada = self._dados.get(chave)
+            if entrada is None or entrada[0] != versao:
+                self.misses += 1
+                return None
+            self._dados.move_to_end(chave)
+            self.hits += 1
+            return entrada[1]
+
+    def put(self, chave, versao: str, corpo):
+        with self._lock:
+            self._dados[chave] = (versao, corpo)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.maxsize:
+                self._dados.popitem(last=False)
+                self.evictions += 1
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._dados),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "hit_rate": self.hits / total if total else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+# identifica o processo: após um restart (ou em outro worker) ETags antigos nunca coincidem
+_BOOT_ID = os.urandom(4).hex()
+
+# WORKOUT_RESPONSE_CACHE_TTL=0 desliga o limite (só seguro com um único processo escrevendo)
+atletas_version = TableVersion(ttl=float(os.getenv("WORKOUT_RESPONSE_CACHE_TTL", "5")) or None)
+atletas_responses = ResponseCache(maxsize=int(os.getenv("WORKOUT_RESPONSE_CACHE_SIZE", "256")))
+
+
+def etag_for(chave, versao: str) -> str:
+    # depende só da chave e da versão: If-None-Match é respondido sem consultar cache nem banco
+    digest = hashlib.blake2b(repr(chave).encode(), digest_size=8).hexdigest()
+    return f'"{_BOOT_ID}-{versao}-{digest}"'
@@ -1,6 +1,7 @@
+from sqlalchemy import insert, literal, select, tuple_
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from . import models, schemas
+from . import cache, models, schemas, search
 
 
 def create_categoria(db: Session, payload: schemas.CategoriaCreate):
@@ -8,6 +9,8 @@ def create_categoria(db: Session, payload: schemas.CategoriaCreate):
     db.add(obj)
     db.commit()
     db.refresh(obj)
+    cache.categorias.invalidate(obj.id)
+    cache.atletas_version.bump()
     return obj
 
 
@@ -16,6 +19,8 @@ def create_centro(db: Session, payload: schemas.CentroCreate):
     db.add(obj)
     db.commit()
     db.refresh(obj)
+    cache.centros.invalidate(obj.id)
+    cache.atletas_version.bump()
     return obj
 
 
@@ -36,14 +41,141 @@ def create_atleta(db: Session, payload: schemas.AtletaCreate):
     except IntegrityError:
         db.rollback()
         raise
+    cache.atletas_version.bump()
     db.refresh(obj)
     return obj
 
 
-def get_atletas(db: Session, nome: str = None, cpf: str = None):
-    q = db.query(models.Atleta)
+def _atleta_values(payload: schemas.AtletaCreate):
+    return {
+        "id": models.gen_uuid(),
+        "nome": payload.nome,
+        "nome_normalizado": models.normalizar_nome(payload.nome),
+        "cpf": payload.cpf,
+        "idade": payload.idade,
+        "peso": payload.peso,
+        "altura": payload.altura,
+        "sexo": payload.sexo,
+        "centro_treinamento_id": payload.centro_treinamento_id,
+        "categoria_id": payload.categoria_id,
+    }
+
+
+def _conflito_cpf(cpf):
+    return f"Já existe um atleta cadastrado com o cpf: {cpf}"
+
+
+def bulk_create_atletas(db: Session, itens):
+    # itens: lista de (linha, AtletaCreate). Um único executemany por lote;
+    # CPFs já cadastrados (ou repetidos no lote) e linhas rejeitadas pelo banco são
+    # devolvidos como erros (linha, cpf, mensagem) sem abortar o lote.
+    cpfs = [payload.cpf for _, payload in itens]
+    existentes = set(db.scalars(select(models.Atleta.cpf).where(models.Atleta.cpf.in_(cpfs))))
+    erros = []
+    valores = []
+    for linha, payload in itens:
+        if payload.cpf in existentes:
+            erros.append((linha, payload.cpf, _conflito_cpf(payload.cpf)))
+            continue
+        existentes.add(payload.cpf)
+        valores.append((linha, _atleta_values(payload)))
+    if not valores:
+        return 0, erros
+    try:
+        db.execute(insert(models.Atleta), [v for _, v in valores])
+        db.commit()
+        cache.atletas_version.bump()
+        return len(valores), erros
+    except IntegrityError:
+        db.rollback()
+    # outro processo inseriu um dos CPFs entre a checagem e o insert, ou alguma linha
+    # viola outra restrição (ex.: FK inexistente): refaz linha a linha
+    inseridos = 0
+    for linha, v in valores:
+        try:
+            with db.begin_nested():
+                db.execute(insert(models.Atleta), [v])
+            inseridos += 1
+        except IntegrityError as e:
+            # só é conflito de CPF se o CPF de fato já está gravado
+            if db.scalar(select(models.Atleta.id).where(models.Atleta.cpf == v["cpf"])) is not None:
+                erros.append((linha, v["cpf"], _conflito_cpf(v["cpf"])))
+            else:
+                erros.append((linha, v["cpf"], str(e.orig)))
+    db.commit()
+    cache.atletas_version.bump()
+    return inseridos, erros
+
+
+def atletas_query(nome: str = None, cpf: str = None, prefixo: bool = False):
+    # projeção só com as colunas da listagem; os nomes de centro/categoria vêm do
+    # cache de lookup (resolver_nomes). O mesmo SELECT serve às sessões síncronas e assíncronas
+    q = select(
+        models.Atleta.id,
+        models.Atleta.nome,
+        models.Atleta.centro_treinamento_id,
+        models.Atleta.categoria_id,
+    )
     if nome:
-        q = q.filter(models.Atleta.nome.ilike(f"%{nome}%"))
+        q = search.filtrar_por_nome(q, nome, prefixo=prefixo)
     if cpf:
         q = q.filter(models.Atleta.cpf == cpf)
-    return q.order_by(models.Atleta.nome).all()
+    return q.order_by(models.Atleta.nome, models.Atleta.id)
+
+
+def atletas_keyset_query(nome: str = None, cpf: str = None, prefixo: bool = False, after: tuple = None, limit: int = 50):
+    # paginação por cursor em (nome, id): custo constante mesmo em páginas profundas
+    q = atletas_query(nome=nome, cpf=cpf, prefixo=prefixo)
+    if after:
+        nome, atleta_id = after
+        cursor = tuple_(literal(nome, models.Atleta.nome.type), literal(atleta_id, models.Atleta.id.type))
+        q = q.filter(tuple_(models.Atleta.nome, models.Atleta.id) > cursor)
+    return q.limit(limit)
+
+
+def get_atletas(db: Session, nome: str = None, cpf: str = None, prefixo: bool = False):
+    # devolve o SELECT (sem executar) para que a paginação aplique LIMIT/OFFSET no banco
+    return atletas_query(nome=nome, cpf=cpf, prefixo=prefixo)
+
+
+def get_atletas_keyset(
+    db: Session, nome: str = None, cpf: str = None, prefixo: bool = False, after: tuple = None, limit: int = 50
+):
+    return db.execute(atletas_keyset_query(nome=nome, cpf=cpf, prefixo=prefixo, after=after, limit=limit)).all()
+
+
+# (cache, tabela, coluna de atleta com a FK)
+LOOKUPS = (
+    (cache.centros, models.CentroTreinamento, "centro_treinamento_id"),
+    (cache.categorias, models.Categoria, "categoria_id"),
+)
+
+
+def lookup_query(model, ids):
+    return select(model.id, model.nome).where(model.id.in_(ids))
+
+
+def montar_minimal(rows, nomes: dict):
+    centros = nomes["centro_treinamento_id"]
+    categorias = nomes["categoria_id"]
+    return [
+        schemas.AtletaOutMinimal(
+            nome=r.nome,
+            centro_treinamento=centros.get(r.centro_treinamento_id),
+            categoria=categorias.get(r.categoria_id),
+        )
+        for r in rows
+    ]
+
+
+def resolver_nomes(db: Session, rows):
+    # só os ids ausentes do cache vão ao banco (uma consulta por tabela)
+    nomes = {}
+    for lookup, model, coluna in LOOKUPS:
+        encontrados, faltantes = lookup.get_many(getattr(r, coluna) for r in rows)
+        if faltantes:
+            carregados = dict(db.execute(lookup_query(model, faltantes)).all())
+            lookup.put_many(carregados)
+            encontrados.update(carregados)
+        nomes[coluna] = encontrados
+    return montar_minimal(rows, nomes)
@@ -0,0 +1,69 @@
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import cache, crud, models, schemas
+
+
+async def create_categoria(db: AsyncSession, payload: schemas.CategoriaCreate):
+    obj = models.Categoria(nome=payload.nome)
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    cache.categorias.invalidate(obj.id)
+    cache.atletas_version.bump()
+    return obj
+
+
+async def create_centro(db: AsyncSession, payload: schemas.CentroCreate):
+    obj = models.CentroTreinamento(nome=payload.nome, endereco=payload.endereco, proprietario=payload.proprietario)
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    cache.centros.invalidate(obj.id)
+    cache.atletas_version.bump()
+    return obj
+
+
+async def create_atleta(db: AsyncSession, payload: schemas.AtletaCreate):
+    obj = models.Atleta(
+        nome=payload.nome,
+        cpf=payload.cpf,
+        idade=payload.idade,
+        peso=payload.peso,
+        altura=payload.altura,
+        sexo=payload.sexo,
+        centro_treinamento_id=payload.centro_treinamento_id,
+        categoria_id=payload.categoria_id,
+    )
+    db.add(obj)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise
+    cache.atletas_version.bump()
+    await db.refresh(obj)
+    return obj
+
+
+def get_atletas(db: AsyncSession, nome: str = None, cpf: str = None, prefixo: bool = False):
+    return crud.atletas_query(nome=nome, cpf=cpf, prefixo=prefixo)
+
+
+async def get_atletas_keyset(
+    db: AsyncSession, nome: str = None, cpf: str = None, prefixo: bool = False, after: tuple = None, limit: int = 50
+):
+    stmt = crud.atletas_keyset_query(nome=nome, cpf=cpf, prefixo=prefixo, after=after, limit=limit)
+    return (await db.execute(stmt)).all()
+
+
+async def resolver_nomes(db: AsyncSession, rows):
+    nomes = {}
+    for lookup, model, coluna in crud.LOOKUPS:
+        encontrados, faltantes = lookup.get_many(getattr(r, coluna) for r in rows)
+        if faltantes:
+            carregados = dict((await db.execute(crud.lookup_query(model, faltantes))).all())
+            lookup.put_many(carregados)
+            encontrados.update(carregados)
+        nomes[coluna] = encontrados
+    return crud.montar_minimal(rows, nomes)
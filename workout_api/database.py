@@ -1,11 +1,206 @@
-from sqlalchemy import create_engine
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./workout.db")
+# WORKOUT_ASYNC_DB=1 usa engine/sessões assíncronas (aiosqlite / asyncpg) nos endpoints
+ASYNC_DB = os.getenv("WORKOUT_ASYNC_DB", "0") == "1"
+# WORKOUT_BINARY_IDS=1 guarda ids como UUID de 16 bytes em vez de texto (ver models.CompactUUID)
+BINARY_IDS = os.getenv("WORKOUT_BINARY_IDS", "0") == "1"
+
+# pool de conexões (Postgres e SQLite em arquivo)
+POOL_SIZE = int(os.getenv("WORKOUT_POOL_SIZE", "5"))
+POOL_MAX_OVERFLOW = int(os.getenv("WORKOUT_POOL_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("WORKOUT_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("WORKOUT_POOL_RECYCLE", "-1"))
+POOL_PRE_PING = os.getenv("WORKOUT_POOL_PRE_PING", "1") == "1"
+
+# pragmas aplicados a cada nova conexão SQLite
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("WORKOUT_SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("WORKOUT_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("WORKOUT_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("WORKOUT_SQLITE_CACHE_SIZE", "-64000")),  # negativo = KiB
+    "busy_timeout": int(os.getenv("WORKOUT_SQLITE_BUSY_TIMEOUT", "5000")),
+}
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkins = 0
+            self.connects = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+
+    def record_wait(self, segundos: float, timeout: bool = False):
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_total += segundos
+            self.wait_max = max(self.wait_max, segundos)
+
+    def record_checkin(self):
+        with self._lock:
+            self.checkins += 1
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            data = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": (self.wait_total / self.checkouts * 1000) if self.checkouts else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+            }
+        if isinstance(pool, QueuePool):
+            data.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                overflow=pool.overflow(),
+                checked_in=pool.checkedin(),
+            )
+        return data
+
+
+class _TimedPoolMixin:
+    # mede quanto cada checkout espera por uma conexão livre
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_wait(0.0, timeout=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - inicio)
+        return conn
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    metrics = PoolMetrics()
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+
+def _connect_args(url):
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
+
+
+def _is_memory_sqlite(url):
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":"))
 
-DATABASE_URL = "sqlite:///./workout.db"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+def _engine_kwargs(url, is_async=False):
+    kwargs = {"connect_args": _connect_args(url)}
+    if _is_memory_sqlite(url):
+        # SQLite em memória precisa do pool padrão (uma única conexão compartilhada)
+        return kwargs
+    kwargs.update(
+        poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_timeout=POOL_TIMEOUT,
+        pool_recycle=POOL_RECYCLE,
+        pool_pre_ping=POOL_PRE_PING and not url.startswith("sqlite"),
+    )
+    return kwargs
+
+
+def _set_sqlite_pragmas(dbapi_conn, connection_record):
+    cursor = dbapi_conn.cursor()
+    for nome, valor in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {nome}={valor}")
+    cursor.close()
+
+
+def _instrument(sync_engine, url, metrics):
+    if url.startswith("sqlite") and not _is_memory_sqlite(url):
+        event.listen(sync_engine, "connect", _set_sqlite_pragmas)
+    event.listen(sync_engine, "connect", lambda *a: metrics.record_connect())
+    event.listen(sync_engine, "checkin", lambda *a: metrics.record_checkin())
+
+
+def async_url(url):
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefixo in ("postgresql+psycopg2:", "postgresql:", "postgres:"):
+        if url.startswith(prefixo):
+            return "postgresql+asyncpg:" + url[len(prefixo):]
+    return url
+
+
+engine = create_engine(DATABASE_URL, **_engine_kwargs(DATABASE_URL))
+_instrument(engine, DATABASE_URL, TimedQueuePool.metrics)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DB:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(async_url(DATABASE_URL), **_engine_kwargs(DATABASE_URL, is_async=True))
+    _instrument(async_engine.sync_engine, DATABASE_URL, TimedAsyncQueuePool.metrics)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def get_pool_metrics():
+    pools = {"sync": TimedQueuePool.metrics.snapshot(engine.pool)}
+    if async_engine is not None:
+        pools["async"] = TimedAsyncQueuePool.metrics.snapshot(async_engine.sync_engine.pool)
+    return pools
+
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+
+
+async def init_db_async():
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+
+@contextmanager
+def count_queries(bind=None):
+    # conta os comandos SQL executados dentro do bloco (útil para detectar N+1 em testes)
+    bind = bind or (async_engine.sync_engine if ASYNC_DB else engine)
+    counter = QueryCounter()
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        counter.count += 1
+        counter.statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", _on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(bind, "before_cursor_execute", _on_execute)
@@ -0,0 +1,132 @@
+import argparse
+import csv
+import json
+import sys
+
+from pydantic import ValidationError
+
+from . import crud, models, schemas
+
+BATCH_SIZE = 500
+FORMATOS = ("jsonl", "csv")
+
+
+class Importacao:
+    # acumula linhas validadas e grava em lotes via crud.bulk_create_atletas
+    def __init__(self, db, formato: str = "jsonl", batch_size: int = BATCH_SIZE):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato inválido: {formato}")
+        self.db = db
+        self.formato = formato
+        self.batch_size = batch_size
+        self.inseridos = 0
+        self.erros = []
+        self._cabecalho = None
+        self._lote = []
+        self._linha = 0
+        self._pendente = None  # linhas de um registro CSV com campo entre aspas ainda aberto
+        self._inicio = 0
+
+    def _registro(self, texto: str):
+        if self.formato == "jsonl":
+            return json.loads(texto)
+        valores = next(csv.reader([texto]))
+        return {k: (v if v != "" else None) for k, v in zip(self._cabecalho, valores)}
+
+    def _juntar_csv(self, texto: str):
+        # um campo entre aspas pode conter quebras de linha: junta as linhas até as aspas fecharem
+        # (aspas escapadas "" não mudam a paridade). Devolve None enquanto o registro está aberto
+        if self._pendente is None:
+            self._inicio = self._linha
+            if texto.count('"') % 2 == 0:
+                return texto
+            self._pendente = []
+        self._pendente.append(texto.rstrip("\r\n"))
+        registro = "\n".join(self._pendente)
+        if registro.count('"') % 2:
+            return None
+        self._pendente = None
+        return registro
+
+    def adicionar(self, texto: str) -> bool:
+        # devolve True quando o lote atual está cheio e deve ser descarregado
+        self._linha += 1
+        linha = self._linha
+        if self.formato == "csv":
+            texto = self._juntar_csv(texto)
+            if texto is None:
+                return False
+            linha = self._inicio
+        texto = texto.strip()
+        if not texto:
+            return False
+        if self.formato == "csv" and self._cabecalho is None:
+            self._cabecalho = next(csv.reader([texto]))
+            return False
+        try:
+            payload = schemas.AtletaCreate(**self._registro(texto))
+        except (ValueError, TypeError, ValidationError) as e:
+            self.erros.append({"linha": linha, "erro": str(e)})
+            return False
+        if not (models.id_valido(payload.categoria_id) and models.id_valido(payload.centro_treinamento_id)):
+            self.erros.append({"linha": linha, "erro": "Id de centro de treinamento ou categoria inválido"})
+            return False
+        self._lote.append((linha, payload))
+        return len(self._lote) >= self.batch_size
+
+    def fechar(self):
+        # fim do arquivo: grava o último lote; um registro CSV com aspas abertas vira erro
+        if self._pendente is not None:
+            self.erros.append({"linha": self._inicio, "erro": "Campo entre aspas não foi fechado"})
+            self._pendente = None
+        self.descarregar()
+
+    def descarregar(self):
+        if not self._lote:
+            return
+        lote, self._lote = self._lote, []
+        inseridos, erros = crud.bulk_create_atletas(self.db, lote)
+        self.inseridos += inseridos
+        for linha, cpf, erro in erros:
+            self.erros.append({"linha": linha, "cpf": cpf, "erro": erro})
+
+    def resultado(self):
+        return {"inseridos": self.inseridos, "erros": sorted(self.erros, key=lambda e: e["linha"])}
+
+
+def importar(db, linhas, formato: str = "jsonl", batch_size: int = BATCH_SIZE):
+    imp = Importacao(db, formato, batch_size)
+    for texto in linhas:
+        if imp.adicionar(texto):
+            imp.descarregar()
+    imp.fechar()
+    return imp.resultado()
+
+
+def main(argv=None):
+    from .database import SessionLocal, engine, init_db
+    from .search import init_search
+
+    parser = argparse.ArgumentParser(description="Importa atletas em lote (JSON-lines ou CSV)")
+    parser.add_argument("arquivo", help="caminho do arquivo ou '-' para stdin")
+    parser.add_argument("--formato", choices=FORMATOS, default=None)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    formato = args.formato or ("csv" if args.arquivo.endswith(".csv") else "jsonl")
+    init_db()
+    init_search(engine)
+    db = SessionLocal()
+    try:
+        if args.arquivo == "-":
+            resultado = importar(db, sys.stdin, formato, args.batch_size)
+        else:
+            with open(args.arquivo, encoding="utf-8", newline="") as f:
+                resultado = importar(db, f, formato, args.batch_size)
+    finally:
+        db.close()
+    print(json.dumps(resultado, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
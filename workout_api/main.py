@@ -1,10 +1,27 @@
-from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi_pagination import add_pagination, paginate, LimitOffsetPage, Params
+import base64
+import codecs
+import json
+
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from fastapi_pagination import add_pagination, LimitOffsetPage, LimitOffsetParams
+from fastapi_pagination.ext.sqlalchemy import apaginate, paginate
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-
-from . import models, schemas, crud
-from .database import SessionLocal, init_db
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError, StatementError
+
+from . import models, schemas, cache, crud, crud_async, importacao, search
+from .database import (
+    ASYNC_DB,
+    AsyncSessionLocal,
+    SessionLocal,
+    async_engine,
+    engine,
+    get_pool_metrics,
+    init_db,
+    init_db_async,
+)
 
 app = FastAPI(title="WorkoutAPI - Crossfit Competition")
 
@@ -17,40 +34,155 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# sessão usada pelos endpoints: AsyncSession com WORKOUT_ASYNC_DB=1, Session caso contrário
+get_session = get_async_db if ASYNC_DB else get_db
+
+
+async def _run(funcao: str, db, *args, **kwargs):
+    # no modo assíncrono chama crud_async; no síncrono roda a função de crud no threadpool
+    if ASYNC_DB:
+        return await getattr(crud_async, funcao)(db, *args, **kwargs)
+    return await run_in_threadpool(getattr(crud, funcao), db, *args, **kwargs)
+
+
 @app.on_event("startup")
-def startup():
-    init_db()
+async def startup():
+    if ASYNC_DB:
+        await init_db_async()
+        await search.init_search_async(async_engine)
+    else:
+        init_db()
+        search.init_search(engine)
 
 
 @app.post("/categoria", status_code=201)
-def create_categoria(payload: schemas.CategoriaCreate, db: Session = Depends(get_db)):
-    return crud.create_categoria(db, payload)
+async def create_categoria(payload: schemas.CategoriaCreate, db=Depends(get_session)):
+    return await _run("create_categoria", db, payload)
 
 
 @app.post("/centro", status_code=201)
-def create_centro(payload: schemas.CentroCreate, db: Session = Depends(get_db)):
-    return crud.create_centro(db, payload)
+async def create_centro(payload: schemas.CentroCreate, db=Depends(get_session)):
+    return await _run("create_centro", db, payload)
 
 
 @app.post("/atletas", status_code=201)
-def create_atleta(payload: schemas.AtletaCreate, db: Session = Depends(get_db)):
+async def create_atleta(payload: schemas.AtletaCreate, db=Depends(get_session)):
     try:
-        obj = crud.create_atleta(db, payload)
+        obj = await _run("create_atleta", db, payload)
         return obj
     except IntegrityError as e:
         raise HTTPException(status_code=303, detail=f"Já existe um atleta cadastrado com o cpf: {payload.cpf}")
+    except StatementError:
+        # com WORKOUT_BINARY_IDS=1, ids de centro/categoria precisam ser UUIDs válidos
+        raise HTTPException(status_code=422, detail="Id de centro de treinamento ou categoria inválido")
+
+
+@app.post("/atletas/bulk", response_model=schemas.AtletaBulkResult)
+async def bulk_atletas(
+    request: Request,
+    formato: str = None,
+    batch_size: int = Query(importacao.BATCH_SIZE, ge=1, le=10000),
+    db: Session = Depends(get_db),
+):
+    # sempre usa a Session síncrona: os lotes já são gravados fora do event loop
+    # corpo lido como stream (JSON-lines ou CSV); cada lote cheio vai para o banco em um executemany
+    if formato is None:
+        formato = "csv" if "csv" in request.headers.get("content-type", "") else "jsonl"
+    if formato not in importacao.FORMATOS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido: {formato}")
+    imp = importacao.Importacao(db, formato, batch_size)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    resto = ""
+    async for chunk in request.stream():
+        resto += decoder.decode(chunk)
+        *linhas, resto = resto.split("\n")
+        for linha in linhas:
+            if imp.adicionar(linha):
+                await run_in_threadpool(imp.descarregar)
+    resto += decoder.decode(b"", final=True)
+    if resto:
+        imp.adicionar(resto)
+    await run_in_threadpool(imp.fechar)
+    return imp.resultado()
+
+
+def _encode_cursor(nome: str, atleta_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([nome, atleta_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        nome, atleta_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if not isinstance(nome, str) or not isinstance(atleta_id, str) or not models.id_valido(atleta_id):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return nome, atleta_id
 
 
 @app.get("/atletas", response_model=LimitOffsetPage[schemas.AtletaOutMinimal])
-def list_atletas(nome: str = None, cpf: str = None, params: Params = Depends(), db: Session = Depends(get_db)):
-    items = crud.get_atletas(db, nome=nome, cpf=cpf)
-
-    out = []
-    for a in items:
-        ct_name = a.centro_treinamento.nome if a.centro_treinamento else None
-        cat_name = a.categoria.nome if a.categoria else None
-        out.append(schemas.AtletaOutMinimal(nome=a.nome, centro_treinamento=ct_name, categoria=cat_name))
-    return paginate(out, params)
+async def list_atletas(
+    request: Request,
+    nome: str = None,
+    cpf: str = None,
+    prefixo: bool = False,
+    params: LimitOffsetParams = Depends(),
+    db=Depends(get_session),
+):
+    # ETag derivado da versão da tabela: If-None-Match igual responde 304 sem ir ao banco
+    versao = cache.atletas_version.value
+    chave = (nome, cpf, prefixo, params.limit, params.offset)
+    etag = cache.etag_for(chave, versao)
+    if request.headers.get("if-none-match") == etag:
+        cache.atletas_responses.record_not_modified()
+        return Response(status_code=304, headers={"ETag": etag})
+    corpo = cache.atletas_responses.get(chave, versao)
+    if corpo is None:
+        # COUNT + LIMIT/OFFSET executados no banco; só a página atual é carregada
+        query = crud.get_atletas(db, nome=nome, cpf=cpf, prefixo=prefixo)
+        if ASYNC_DB:
+            async def resolver(rows):
+                return await crud_async.resolver_nomes(db, rows)
+
+            page = await apaginate(db, query, params, transformer=resolver)
+        else:
+            page = await run_in_threadpool(
+                paginate, db, query, params, transformer=lambda rows: crud.resolver_nomes(db, rows)
+            )
+        corpo = jsonable_encoder(page)
+        cache.atletas_responses.put(chave, versao, corpo)
+    return JSONResponse(corpo, headers={"ETag": etag})
+
+
+@app.get("/atletas/keyset", response_model=schemas.AtletaKeysetPage)
+async def list_atletas_keyset(
+    nome: str = None,
+    cpf: str = None,
+    prefixo: bool = False,
+    cursor: str = None,
+    limit: int = Query(50, ge=1, le=100),
+    db=Depends(get_session),
+):
+    after = _decode_cursor(cursor) if cursor else None
+    items = await _run("get_atletas_keyset", db, nome=nome, cpf=cpf, prefixo=prefixo, after=after, limit=limit)
+    next_cursor = _encode_cursor(items[-1].nome, items[-1].id) if len(items) == limit else None
+    return schemas.AtletaKeysetPage(items=await _run("resolver_nomes", db, items), next_cursor=next_cursor)
+
+
+@app.get("/metrics/pool")
+def pool_metrics():
+    # espera e checkouts do pool de conexões, para dimensionar pool_size/max_overflow
+    return get_pool_metrics()
+
+
+@app.get("/metrics/cache")
+def cache_metrics():
+    return {"lookup": cache.lookup_stats(), "atletas_responses": cache.atletas_responses.stats()}
 
 
 add_pagination(app)
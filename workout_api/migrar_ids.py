@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+
+from sqlalchemy import create_engine, inspect, text
+
+# colunas de id (texto) por tabela, na ordem em que as tabelas são recriadas
+ID_COLUMNS = {
+    "categoria": ("id",),
+    "centro_treinamento": ("id",),
+    "atleta": ("id", "centro_treinamento_id", "categoria_id"),
+}
+
+
+def migrar_sqlite(url: str):
+    # recria as tabelas com ids de 16 bytes e copia os dados (procedimento de ALTER TABLE do SQLite)
+    # importar models registra as tabelas (já com ids binários) em Base.metadata
+    from . import models, search
+
+    metadata = models.Base.metadata
+
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        tabelas = set(inspect(conn).get_table_names())
+        if "atleta" not in tabelas:
+            print("Banco vazio: nada a migrar.")
+            return
+        search._migrar_coluna_normalizada(conn)
+        for nome in ID_COLUMNS:
+            conn.execute(text(f"ALTER TABLE {nome} RENAME TO {nome}_old"))
+            indices = conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :t AND sql IS NOT NULL"),
+                {"t": f"{nome}_old"},
+            ).scalars().all()
+            for indice in indices:
+                conn.execute(text(f"DROP INDEX {indice}"))
+        metadata.create_all(conn)
+        for nome, colunas in ID_COLUMNS.items():
+            tabela = metadata.tables[nome]
+            rows = [dict(r._mapping) for r in conn.execute(text(f"SELECT * FROM {nome}_old"))]
+            for row in rows:
+                for coluna in colunas:
+                    # ids vazios (legado) viram NULL em vez de falhar a conversão
+                    if not row.get(coluna):
+                        row[coluna] = None
+            if rows:
+                conn.execute(tabela.insert(), rows)
+            conn.execute(text(f"DROP TABLE {nome}_old"))
+            print(f"{nome}: {len(rows)} linhas migradas")
+    # as tabelas foram recriadas com novos rowids: o índice FTS precisa ser refeito
+    search.init_search(engine, rebuild=True)
+    with engine.connect() as conn:
+        conn.execute(text("VACUUM"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Converte ids texto (VARCHAR) para UUID de 16 bytes")
+    parser.add_argument("banco", nargs="?", default="workout.db", help="arquivo SQLite (padrão: workout.db)")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.banco):
+        sys.exit(f"Arquivo não encontrado: {args.banco}")
+    # models escolhe o tipo das colunas de id ao ser importado
+    os.environ["WORKOUT_BINARY_IDS"] = "1"
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.banco}"
+    migrar_sqlite(os.environ["DATABASE_URL"])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,89 @@
+import os
+import time
+import unicodedata
 import uuid
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, UniqueConstraint
-from sqlalchemy.orm import relationship
-from .database import Base
+from sqlalchemy import Column, String, Integer, Float, ForeignKey, Index, LargeBinary, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import relationship, validates
+from sqlalchemy.types import TypeDecorator
+from .database import BINARY_IDS, Base
+
+
+def uuid7():
+    # UUIDv7: 48 bits de timestamp em ms + aleatório; ordenado no tempo, então inserts ficam no fim do índice
+    ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    valor = (ms & ((1 << 48) - 1)) << 80
+    valor |= 0x7 << 76                       # versão 7
+    valor |= ((rand >> 62) & 0xFFF) << 64    # rand_a (12 bits)
+    valor |= 0b10 << 62                      # variante RFC 4122
+    valor |= rand & ((1 << 62) - 1)          # rand_b (62 bits)
+    return uuid.UUID(int=valor)
 
 
 def gen_uuid():
-    return str(uuid.uuid4())
+    return str(uuid7())
+
+
+class CompactUUID(TypeDecorator):
+    # guarda o id em 16 bytes (BLOB no SQLite, uuid nativo no Postgres); na aplicação continua string
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(PG_UUID(as_uuid=True))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return value if dialect.name == "postgresql" else value.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        return str(uuid.UUID(bytes=bytes(value)))
+
+
+# bancos existentes com ids em texto são convertidos por migrar_ids.py
+IdType = CompactUUID if BINARY_IDS else String
+
+
+def id_valido(valor):
+    # com ids binários só UUIDs chegam ao banco; o resto viraria StatementError (500)
+    if not BINARY_IDS or valor is None:
+        return True
+    try:
+        uuid.UUID(str(valor))
+    except ValueError:
+        return False
+    return True
+
+
+def normalizar_nome(nome):
+    # minúsculo e sem acentos: "João" -> "joao"
+    decomposto = unicodedata.normalize("NFKD", nome or "")
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def _nome_normalizado_default(context):
+    return normalizar_nome(context.get_current_parameters()["nome"])
 
 
 class Categoria(Base):
     __tablename__ = "categoria"
-    id = Column(String, primary_key=True, default=gen_uuid)
+    id = Column(IdType, primary_key=True, default=gen_uuid)
     nome = Column(String(50), unique=True, nullable=False)
 
 
 class CentroTreinamento(Base):
     __tablename__ = "centro_treinamento"
-    id = Column(String, primary_key=True, default=gen_uuid)
+    id = Column(IdType, primary_key=True, default=gen_uuid)
     nome = Column(String(100), unique=True, nullable=False)
     endereco = Column(String(200))
     proprietario = Column(String(100))
@@ -24,15 +91,24 @@ class CentroTreinamento(Base):
 
 class Atleta(Base):
     __tablename__ = "atleta"
-    id = Column(String, primary_key=True, default=gen_uuid)
+    id = Column(IdType, primary_key=True, default=gen_uuid)
     nome = Column(String(100), nullable=False)
+    nome_normalizado = Column(String(100), nullable=False, index=True, default=_nome_normalizado_default)
     cpf = Column(String(20), nullable=False, unique=True)
     idade = Column(Integer)
     peso = Column(Float)
     altura = Column(Float)
     sexo = Column(String(1))
-    centro_treinamento_id = Column(String, ForeignKey("centro_treinamento.id"))
-    categoria_id = Column(String, ForeignKey("categoria.id"))
+    centro_treinamento_id = Column(IdType, ForeignKey("centro_treinamento.id"))
+    categoria_id = Column(IdType, ForeignKey("categoria.id"))
 
     centro_treinamento = relationship("CentroTreinamento")
     categoria = relationship("Categoria")
+
+    __table_args__ = (Index("ix_atleta_nome_id", "nome", "id"),)
+
+    @validates("nome")
+    def _sincronizar_nome_normalizado(self, key, nome):
+        # sem onupdate: num UPDATE que não muda o nome a coluna não é recalculada
+        self.nome_normalizado = normalizar_nome(nome)
+        return nome
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 
@@ -30,3 +30,19 @@ class AtletaOutMinimal(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class AtletaKeysetPage(BaseModel):
+    items: List[AtletaOutMinimal]
+    next_cursor: Optional[str] = None
+
+
+class AtletaBulkErro(BaseModel):
+    linha: int
+    cpf: Optional[str] = None
+    erro: str
+
+
+class AtletaBulkResult(BaseModel):
+    inseridos: int
+    erros: List[AtletaBulkErro] = []
@@ -0,0 +1,117 @@
+from sqlalchemy import Select, inspect, literal_column, select, table, text
+from sqlalchemy.engine import Connection, Engine
+
+from . import models
+
+# tamanho mínimo para os índices de trigramas (FTS5 trigram / pg_trgm)
+MIN_TRIGRAMA = 3
+
+# True quando a tabela FTS5 (SQLite) existe; no Postgres o LIKE já usa o índice pg_trgm
+_fts_disponivel = False
+
+
+def _migrar_coluna_normalizada(conn: Connection):
+    # bancos criados antes da coluna nome_normalizado: adiciona, preenche e indexa
+    colunas = {c["name"] for c in inspect(conn).get_columns("atleta")}
+    if "nome_normalizado" in colunas:
+        return
+    conn.execute(text("ALTER TABLE atleta ADD COLUMN nome_normalizado VARCHAR(100) NOT NULL DEFAULT ''"))
+    rows = conn.execute(text("SELECT id, nome FROM atleta")).fetchall()
+    if rows:
+        conn.execute(
+            text("UPDATE atleta SET nome_normalizado = :n WHERE id = :id"),
+            [{"id": r.id, "n": models.normalizar_nome(r.nome)} for r in rows],
+        )
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_atleta_nome_normalizado ON atleta (nome_normalizado)"))
+
+
+def _init_sqlite_fts(conn, rebuild: bool = False):
+    existia = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'atleta_fts'")
+    ).first() is not None
+    conn.execute(text(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS atleta_fts USING fts5("
+        "nome_normalizado, content='atleta', content_rowid='rowid', tokenize='trigram')"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS atleta_fts_ai AFTER INSERT ON atleta BEGIN "
+        "INSERT INTO atleta_fts(rowid, nome_normalizado) VALUES (new.rowid, new.nome_normalizado); END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS atleta_fts_ad AFTER DELETE ON atleta BEGIN "
+        "INSERT INTO atleta_fts(atleta_fts, rowid, nome_normalizado) "
+        "VALUES ('delete', old.rowid, old.nome_normalizado); END"
+    ))
+    conn.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS atleta_fts_au AFTER UPDATE OF nome_normalizado ON atleta BEGIN "
+        "INSERT INTO atleta_fts(atleta_fts, rowid, nome_normalizado) "
+        "VALUES ('delete', old.rowid, old.nome_normalizado); "
+        "INSERT INTO atleta_fts(rowid, nome_normalizado) VALUES (new.rowid, new.nome_normalizado); END"
+    ))
+    # os triggers mantêm o índice em dia; reconstruir (O(n)) só quando ele é novo ou a pedido
+    if rebuild or not existia:
+        conn.execute(text("INSERT INTO atleta_fts(atleta_fts) VALUES ('rebuild')"))
+
+
+def _init_postgres_trgm(conn, rebuild: bool = False):
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_atleta_nome_trgm ON atleta USING gin (nome_normalizado gin_trgm_ops)"
+    ))
+
+
+def _migrar_indice_keyset(conn: Connection):
+    # create_all não cria índices em tabelas que já existem
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_atleta_nome_id ON atleta (nome, id)"))
+
+
+def _init_search(conn: Connection, rebuild: bool = False):
+    global _fts_disponivel
+    _migrar_coluna_normalizada(conn)
+    _migrar_indice_keyset(conn)
+    dialeto = conn.dialect.name
+    init = {"sqlite": _init_sqlite_fts, "postgresql": _init_postgres_trgm}.get(dialeto)
+    if init is None:
+        return
+    try:
+        with conn.begin_nested():
+            init(conn, rebuild)
+        _fts_disponivel = dialeto == "sqlite"
+    except Exception:
+        # SQLite sem FTS5/trigram ou Postgres sem permissão para a extensão: usa LIKE simples
+        _fts_disponivel = False
+
+
+def init_search(engine: Engine, rebuild: bool = False):
+    with engine.begin() as conn:
+        _init_search(conn, rebuild)
+
+
+async def init_search_async(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(_init_search)
+
+
+def _escape_like(termo: str) -> str:
+    return termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def filtrar_por_nome(q: Select, termo: str, prefixo: bool = False) -> Select:
+    # escolhe a estratégia por requisição:
+    # - prefixo: faixa no índice btree de nome_normalizado
+    # - substring com >= 3 caracteres: índice de trigramas (FTS5 no SQLite, pg_trgm no Postgres)
+    # - substring curta ou sem índice de trigramas: LIKE na coluna normalizada
+    coluna = models.Atleta.nome_normalizado
+    termo = models.normalizar_nome(termo)
+    if prefixo:
+        return q.filter(coluna >= termo, coluna < termo + "\U0010ffff")
+    if _fts_disponivel and len(termo) >= MIN_TRIGRAMA:
+        frase = '"' + termo.replace('"', '""') + '"'
+        rowids = (
+            select(literal_column("rowid"))
+            .select_from(table("atleta_fts"))
+            .where(text("atleta_fts MATCH :termo_fts").bindparams(termo_fts=frase))
+        )
+        return q.filter(literal_column("atleta.rowid").in_(rowids))
+    # no Postgres o LIKE abaixo já usa o índice gin_trgm_ops quando existe
+    return q.filter(coluna.like(f"%{_escape_like(termo)}%", escape="\\"))